@@ -0,0 +1,139 @@
+# Benchmark the matching and search paths on the synthetic corpus, against a local stub
+# of YTMusic that simulates network latency. Reports throughput, per-call latency
+# percentiles and peak memory per stage.
+# Usage: python benchmarks/bench_pipeline.py
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "youtube_music"))
+
+import ytm_ops  # noqa: E402
+from corpus import generate_corpus  # noqa: E402
+from match import MusicMatcher, normalize  # noqa: E402
+from stub_ytmusic import StubYTMusic  # noqa: E402
+from ytm_ops import TYMusicOp  # noqa: E402
+
+
+def percentiles(samples: List[float]) -> dict:
+    if len(samples) < 2:
+        value = samples[0] if samples else 0.0
+        return {"p50": value, "p90": value, "p99": value}
+    q = statistics.quantiles(samples, n=100, method="inclusive")
+    return {"p50": q[49], "p90": q[89], "p99": q[98]}
+
+
+def measure(name: str, make_calls: Callable[[], List[Callable[[], object]]]):
+    """
+    Time each call, then replay a fresh set of calls under tracemalloc to measure the peak memory.
+    make_calls must build new tracks every time, so cached normalization isn't reused.
+    """
+    calls = make_calls()
+    latencies = []
+    start = time.perf_counter()
+    for call in calls:
+        t = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - t)
+    elapsed = time.perf_counter() - start
+
+    calls = make_calls()
+    tracemalloc.start()
+    for call in calls:
+        call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    report(name, elapsed, len(calls), latencies, peak)
+
+
+def report(name: str, elapsed: float, items: int, latencies: List[float], peak: int = None):
+    p = percentiles(latencies)
+    memory = f", peak {peak / 1024:.0f} KiB" if peak is not None else ""
+    print(
+        f"{name:<28} {items / elapsed:>10.0f} tracks/s | "
+        f"p50 {p['p50'] * 1000:.3f} ms, p90 {p['p90'] * 1000:.3f} ms, p99 {p['p99'] * 1000:.3f} ms"
+        f"{memory}"
+    )
+
+
+def bench_matching(tracks: List[dict], results: dict, similarity: str):
+    matcher = MusicMatcher(tolerance=0.3, similarity=similarity)
+
+    def make_pairs():
+        normalize.cache_clear()
+        sources = [TYMusicOp._build_external_track(track, matcher.keywords) for track in tracks]
+        candidates = [
+            TYMusicOp._extract_yt_tracks(results[track["name"]], matcher.keywords) for track in tracks
+        ]
+        return zip(sources, candidates)
+
+    measure(
+        f"one_to_one ({similarity})",
+        lambda: [
+            lambda s=s, c=c: matcher.match_track_one_to_one(s, c[0]) for s, c in make_pairs()
+        ],
+    )
+    measure(
+        f"one_to_many ({similarity})",
+        lambda: [
+            lambda s=s, c=c: matcher.match_tracks_one_to_many(s, c) for s, c in make_pairs()
+        ],
+    )
+    print(f"{'':<28} similarity cache: {matcher.similarity_cache_stats()}")
+
+
+def bench_search(tracks: List[dict], results: dict, latency: float, workers: int):
+    stub = StubYTMusic(results, latency=latency, jitter=latency / 2)
+    ytm_ops.YTMusic = lambda *args, **kwargs: stub
+    yt_op = TYMusicOp("oauth.json")
+
+    latencies = []
+    tracemalloc.start()
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        cwd = os.getcwd()
+        os.chdir(tmp)  # search_songs writes noresults_yt_*.json to the working directory
+        try:
+            last = time.perf_counter()
+            for _ in yt_op.iter_search_songs(tracks, 0.3, "benchmark", workers=workers):
+                now = time.perf_counter()
+                latencies.append(now - last)
+                last = now
+        finally:
+            os.chdir(cwd)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    report(f"search_songs (workers={workers})", elapsed, len(tracks), latencies, peak)
+    print(f"{'':<28} API calls: {stub.calls}")
+
+
+if __name__ == "__main__":
+    n_tracks = 2000  # tracks for the matching stages
+    n_search = 200  # tracks for the search stages
+    latency = 0.02  # simulated API latency (in seconds)
+
+    tracks, results = generate_corpus(n_tracks)
+    print(f"Corpus: {len(tracks)} tracks, {len(results)} distinct search result sets\n")
+
+    measure(
+        "_extract_yt_tracks",
+        lambda: [lambda r=results[t["name"]]: TYMusicOp._extract_yt_tracks(r) for t in tracks],
+    )
+    bench_matching(tracks, results, "difflib")
+    try:
+        bench_matching(tracks, results, "indel")
+    except ImportError as e:
+        print(f"Skipping 'indel': {e}")
+
+    print("")
+    for workers in (1, 8):
+        bench_search(tracks[:n_search], results, latency, workers)
@@ -0,0 +1,72 @@
+# Benchmark the MusicMatcher similarity engines on a synthetic set of tracks.
+# Usage: python benchmarks/bench_similarity.py
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "youtube_music"))
+
+from match import MusicMatcher, Track  # noqa: E402
+from similarity import Indel  # noqa: E402
+
+WORDS = [
+    "love", "night", "blue", "sky", "dream", "tokyo", "moon", "remix", "live", "(feat. Someone)",
+    "[Live]", "(Instrumental)", "晴天", "稻香", "夜に駆ける", "星", "「夢」", "青空", "花", "世界",
+]
+
+
+def random_text(rng: random.Random, max_words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, max_words)))
+
+
+def build_corpus(n: int, candidates: int, seed: int = 0):
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(n):
+        source = Track(
+            title=random_text(rng, 4),
+            artists=[random_text(rng, 2)],
+            album=random_text(rng, 3),
+            duration=rng.randint(120, 300),
+        )
+        results = [
+            Track(
+                title=rng.choice([source.title, random_text(rng, 4)]),
+                artists=[rng.choice([source.artists[0], random_text(rng, 2)])],
+                album=rng.choice([source.album, random_text(rng, 3), ""]),
+                duration=source.duration + rng.randint(-5, 5),
+                id=f"video{i}",
+                isYT=True,
+                isTopResult=i == 0,
+            )
+            for i in range(candidates)
+        ]
+        corpus.append((source, results))
+    return corpus
+
+
+def run(engine: str, corpus):
+    matcher = MusicMatcher(tolerance=0.3, similarity=engine)
+    start = time.perf_counter()
+    matches = [matcher.match_tracks_one_to_many(source, results) for source, results in corpus]
+    elapsed = time.perf_counter() - start
+    return [(m.id, m.score) if m else None for m in matches], elapsed
+
+
+if __name__ == "__main__":
+    # a fresh corpus per engine, so the normalization cached on each Track doesn't favor the second run
+    corpus = build_corpus(n=2000, candidates=10)
+    baseline, baseline_time = run("difflib", corpus)
+    print(f"difflib: {baseline_time:.3f}s ({len(corpus) / baseline_time:.0f} tracks/s)")
+
+    if Indel is None:
+        print("rapidfuzz not installed, skipping the 'indel' engine.")
+    else:
+        fast, fast_time = run("indel", build_corpus(n=2000, candidates=10))
+        same_ids = sum(1 for a, b in zip(baseline, fast) if (a and a[0]) == (b and b[0]))
+        print(
+            f"indel:   {fast_time:.3f}s ({len(corpus) / fast_time:.0f} tracks/s), "
+            f"speedup x{baseline_time / fast_time:.1f}, "
+            f"same match as difflib: {same_ids}/{len(corpus)}"
+        )
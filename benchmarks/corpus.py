@@ -0,0 +1,112 @@
+# Synthetic corpus for the benchmarks: QQ-style source tracks with CJK/Latin titles and
+# artists, and fake search results shaped like the output of ytmusicapi's YTMusic.search.
+import random
+from typing import Dict, List, Tuple
+
+LATIN_WORDS = [
+    "love", "night", "blue", "sky", "dream", "tokyo", "moon", "summer", "rain", "heart",
+    "city", "light", "forever", "story", "star", "memories", "fire", "ocean", "wings", "hello",
+]
+CJK_WORDS = [
+    "晴天", "稻香", "夜に駆ける", "星", "夢", "青空", "花", "世界", "群青", "春",
+    "恋", "未来", "紅蓮華", "告白", "夜曲", "海", "光", "風", "約束", "月",
+]
+ARTISTS = [
+    "周杰伦", "YOASOBI", "LiSA", "Aimer", "林俊杰", "米津玄師", "Taylor Swift", "Adele",
+    "陈奕迅", "RADWIMPS", "King Gnu", "邓紫棋", "Official髭男dism", "Ed Sheeran", "ヨルシカ",
+]
+DECORATIONS = ["", "", "", " (Official Video)", " (TV Size)", " [MV]", " (feat. Someone)"]
+KEYWORDS = [" (Live)", " (Remix)", " (Instrumental)", " (Cover)"]
+TOP_RESULT = "Top result"
+
+
+def random_title(rng: random.Random) -> str:
+    words = CJK_WORDS if rng.random() < 0.5 else LATIN_WORDS
+    sep = "" if words is CJK_WORDS else " "
+    return sep.join(rng.choice(words) for _ in range(rng.randint(2, 4)))
+
+
+def _result(rng: random.Random, title, artists, album, duration, category, result_type="song"):
+    return {
+        "category": category,
+        "resultType": result_type,
+        "title": title,
+        "album": {"name": album, "id": f"MPREb_{rng.getrandbits(32):08x}"} if album else None,
+        "videoId": f"{rng.getrandbits(44):011x}",
+        "duration": f"{duration // 60}:{duration % 60:02d}",
+        "duration_seconds": duration,
+        "artists": [{"name": a, "id": f"UC{rng.getrandbits(40):010x}"} for a in artists],
+        "isExplicit": False,
+    }
+
+
+def generate_tracks(n: int, seed: int = 0, duplicate_rate: float = 0.2) -> List[dict]:
+    """
+    Generate n QQ-style tracks ({name, artists, album, duration}).
+    duplicate_rate of them repeat an earlier track, like merged playlists do.
+    """
+    rng = random.Random(seed)
+    tracks = []
+    for _ in range(n):
+        if tracks and rng.random() < duplicate_rate:
+            tracks.append(dict(rng.choice(tracks)))
+            continue
+        tracks.append(
+            {
+                "name": random_title(rng),
+                "artists": rng.sample(ARTISTS, rng.randint(1, 2)),
+                "album": random_title(rng),
+                "duration": rng.randint(90, 360),
+            }
+        )
+    return tracks
+
+
+def generate_results(track: dict, rng: random.Random, size: int = 10) -> List[dict]:
+    """
+    Generate fake search results for a track: usually the true song as top result,
+    plus decorated/keyword variants, unrelated songs and non-song results.
+    """
+    results = []
+    if rng.random() < 0.85:
+        results.append(
+            _result(
+                rng,
+                track["name"] + rng.choice(DECORATIONS),
+                track["artists"],
+                rng.choice([track["album"], track["album"], ""]),
+                track["duration"] + rng.randint(-2, 2),
+                TOP_RESULT,
+            )
+        )
+    keyword_title = track["name"] + rng.choice(KEYWORDS)
+    results.append(
+        _result(rng, keyword_title, track["artists"], "", track["duration"] + 30, "Songs")
+    )
+    results.append({"category": "Artists", "resultType": "artist", "artist": track["artists"][0]})
+    while len(results) < size:
+        results.append(
+            _result(
+                rng,
+                random_title(rng),
+                rng.sample(ARTISTS, 1),
+                random_title(rng),
+                rng.randint(90, 360),
+                rng.choice(["Songs", "Videos"]),
+                rng.choice(["song", "video"]),
+            )
+        )
+    return results
+
+
+def generate_corpus(n: int, seed: int = 0) -> Tuple[List[dict], Dict[str, List[dict]]]:
+    """
+    Return (tracks, results by track name) for n generated tracks.
+    """
+    rng = random.Random(seed + 1)
+    tracks = generate_tracks(n, seed)
+    results = {}
+    for track in tracks:
+        if track["name"] not in results:
+            results[track["name"]] = generate_results(track, rng)
+    return tracks, results
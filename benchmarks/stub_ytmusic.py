@@ -0,0 +1,81 @@
+# Local stand-in for ytmusicapi.YTMusic that serves the synthetic corpus with simulated latency.
+import random
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional
+
+from corpus import generate_results
+
+
+class StubYTMusic:
+    def __init__(
+        self,
+        results: Optional[Dict[str, List[dict]]] = None,
+        latency: float = 0.05,
+        jitter: float = 0.02,
+        *args,
+        **kwargs,
+    ):
+        """
+        :param results: Search results by track name, as returned by corpus.generate_corpus.
+        :param latency: Mean simulated latency of an API call (in seconds).
+        :param jitter: Maximum random deviation added to the latency (in seconds).
+        """
+        self.results = results or {}
+        self.latency = latency
+        self.jitter = jitter
+        self.calls: Dict[str, int] = {}
+        self.playlists: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def _call(self, name: str):
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+        if self.latency:
+            time.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+
+    def search(self, query: str, *args, **kwargs) -> List[dict]:
+        self._call("search")
+        # queries start with the track name (detailed = name + artists)
+        results = self.results.get(query)
+        if results is not None:
+            return results
+        for i, char in enumerate(query):
+            if char == " " and query[:i] in self.results:
+                return self.results[query[:i]]
+        return generate_results(
+            {"name": query, "artists": ["Unknown"], "album": "", "duration": 200},
+            random.Random(zlib.crc32(query.encode("utf-8"))),
+        )
+
+    def get_library_playlists(self, limit: int = 25) -> List[dict]:
+        self._call("get_library_playlists")
+        return [{"title": pl["title"], "playlistId": pid} for pid, pl in self.playlists.items()]
+
+    def create_playlist(self, title, description="", privacy_status="PRIVATE", video_ids=None):
+        self._call("create_playlist")
+        playlist_id = f"PL{len(self.playlists):08d}"
+        self.playlists[playlist_id] = {"title": title, "tracks": list(video_ids or [])}
+        return playlist_id
+
+    def get_playlist(self, playlist_id: str, limit: Optional[int] = 100) -> dict:
+        self._call("get_playlist")
+        tracks = self.playlists.get(playlist_id, {}).get("tracks", [])
+        return {"id": playlist_id, "tracks": [{"videoId": vid, "setVideoId": vid} for vid in tracks]}
+
+    def add_playlist_items(self, playlist_id: str, video_ids: List[str], *args, **kwargs) -> dict:
+        self._call("add_playlist_items")
+        self.playlists[playlist_id]["tracks"].extend(video_ids)
+        return {"status": "STATUS_SUCCEEDED"}
+
+    def remove_playlist_items(self, playlist_id: str, videos: List[dict]):
+        self._call("remove_playlist_items")
+        removed = {v["videoId"] for v in videos}
+        playlist = self.playlists[playlist_id]
+        playlist["tracks"] = [vid for vid in playlist["tracks"] if vid not in removed]
+        return "STATUS_SUCCEEDED"
+
+    def delete_playlist(self, playlist_id: str):
+        self._call("delete_playlist")
+        self.playlists.pop(playlist_id, None)
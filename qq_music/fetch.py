@@ -6,35 +6,110 @@
 import json
 import os
 import re
+import sys
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from fingerprint import PlaylistFingerprint, diff_songs, write_delta
+from playlist_store import EXTENSION, write_playlist
+
+# the rate limiter is shared with youtube_music (youtube_music/utils/rate_limit.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "youtube_music"))
+from utils.rate_limit import RateLimiter  # noqa: E402
+
+
+def create_session(
+    pool_size: int = 16, retries: int = 3, backoff_factor: float = 0.5
+) -> requests.Session:
+    """
+    Create a requests session with a connection pool large enough to be shared by all workers.
+    Connection errors, timeouts and 429/5xx responses are retried with exponential backoff.
+    :param pool_size: Number of keep-alive connections kept per host.
+    :param retries: Number of retries of a failed request.
+    :param backoff_factor: Delay before the first retry (in seconds), doubled for each retry.
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=None,  # the playlist POST only reads data, so it is safe to retry
+        respect_retry_after_header=True,
+    )
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
 
 
 class QQMusicList:
-    def __init__(self, id):
+    def __init__(
+        self,
+        id,
+        session: Optional[requests.Session] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        page_size: int = 15,
+        page_workers: int = 1,
+        timeout: Tuple[float, float] = (5, 15),
+        page_retries: int = 3,
+        page_retry_delay: float = 2.0,
+    ):
+        """
+        :param id: QQ Music playlist ID.
+        :param session: Shared requests session (see create_session). A new one is created if not given.
+        :param rate_limiter: Optional rate limiter shared by all requests.
+        :param page_size: Number of songs fetched per page.
+        :param page_workers: Number of pages fetched concurrently.
+        :param timeout: (connect, read) timeout of every request (in seconds).
+        :param page_retries: Number of times a failed page is re-queued before the playlist fails.
+        :param page_retry_delay: Delay before re-fetching a failed page (in seconds), doubled each time.
+        """
         self.id = id
         self.headers = {
             "user-agent": "Mozilla/5.0 (Linux; Android 8.0.0; Pixel 2 XL Build/OPD1.170816.004) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/73.0.3683.103 Mobile Safari/537.36",
             "referer": f"https://y.qq.com/w/taoge.html?ADTAG=profile_h5&id={self.id}",
         }
-        self.session = requests.Session()
+        self.session = session if session is not None else create_session(pool_size=page_workers)
+        self.rate_limiter = rate_limiter
+        self.page_size = page_size
+        self.page_workers = page_workers
+        self.timeout = timeout
+        self.page_retries = page_retries
+        self.page_retry_delay = page_retry_delay
+
+    def _request(self, method, url, **kwargs):
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.request(method, url, **kwargs)
 
     def total_song_num(self):
         url = "https://y.qq.com/n/m/detail/taoge/index.html"
         params = {"ADTAG": "profile_h5", "id": self.id}
         method = "GET"
-        resp = self.session.request(method, url, params=params, headers=self.headers, timeout=10)
+        resp = self._request(method, url, params=params, headers=self.headers)
         if resp.status_code != 200:
-            print("get song num error.")
-            return 0
+            # an empty playlist would be saved otherwise
+            raise RuntimeError(
+                f"Failed to get the song count of playlist {self.id} ({resp.status_code})."
+            )
         total_song_num = re.search(r"共(\d+)首", resp.text).group(1)
         if not isinstance(total_song_num, int):
             total_song_num = int(total_song_num)
         return total_song_num
 
-    def get_list(self, song_num=15):
-        song_list = []
+    def _fetch_page(self, song_begin: int, song_num: int, attempt: int = 0):
+        """
+        Fetch a single page of songs. Returns (playlist name, songs) or None if the page failed.
+        :param attempt: Number of previous failed attempts, to wait before re-fetching the page.
+        """
+        if attempt:
+            time.sleep(self.page_retry_delay * 2 ** (attempt - 1))
         url = "https://c.y.qq.com/qzone/fcg-bin/fcg_ucc_getcdinfo_byids_cp.fcg"
         params = {"_": int(time.time() * 1000)}
         method = "POST"
@@ -53,42 +128,107 @@ class QQMusicList:
             "utf8": "1",
             "onlysong": "0",
             "nosign": "1",
-            "song_begin": 0,
+            "song_begin": str(song_begin),
             "song_num": f"{song_num}",
         }
-        total_song_num = self.total_song_num()
-        for song_begin in range(0, total_song_num, song_num):
-            postdata["song_begin"] = str(song_begin)
-            params["_"] = int(time.time() * 1000)
-            resp = self.session.request(
-                method, url, headers=self.headers, params=params, data=postdata
-            )
+        try:
+            resp = self._request(method, url, headers=self.headers, params=params, data=postdata)
             if resp.status_code != 200:
-                print(f"{song_begin} page fetch failed.")
-                continue
+                print(f"{song_begin} page fetch failed ({resp.status_code}).")
+                return None
             # fetch data
             data = resp.json()
+        except (requests.RequestException, ValueError) as e:
+            # retries exhausted, timeout or invalid JSON
+            print(f"{song_begin} page fetch failed: {e}")
+            return None
+
+        # with open("data.json", "w", encoding="utf-8") as f:
+        #     f.write(json.dumps(data, indent=4, ensure_ascii=False))
 
-            # with open("data.json", "w", encoding="utf-8") as f:
-            #     f.write(json.dumps(data, indent=4, ensure_ascii=False))
-            # break
-
-            cdlist = data.get("cdlist")[0]
-            playlist_name = cdlist.get("dissname")
-            songlist = cdlist.get("songlist")
-            for song in songlist:
-                name = song.get("name")
-                artists = [s.get("name") for s in song.get("singer")]
-                interval = song.get("interval")
-                album = song.get("album").get("name")
-                song_dict = {
-                    "name": name,
-                    "artists": artists,
-                    "album": album,
-                    "duration": interval,
-                }
-                print(song_dict)
-                song_list.append(song_dict)
+        cdlist = data.get("cdlist")[0]
+        playlist_name = cdlist.get("dissname")
+        songlist = cdlist.get("songlist")
+        songs = []
+        for song in songlist:
+            name = song.get("name")
+            artists = [s.get("name") for s in song.get("singer")]
+            interval = song.get("interval")
+            album = song.get("album").get("name")
+            song_dict = {
+                "name": name,
+                "artists": artists,
+                "album": album,
+                "duration": interval,
+            }
+            print(song_dict)
+            songs.append(song_dict)
+        return playlist_name, songs
+
+    def iter_pages(self, song_num: Optional[int] = None, total_song_num: Optional[int] = None):
+        """
+        Yield (playlist name, songs) page by page, in playlist order.
+        At most page_workers pages are in flight, so memory stays bounded.
+        A failed page is re-queued up to page_retries times; after that a RuntimeError is raised,
+        so an incomplete playlist is never saved.
+        """
+        song_num = song_num or self.page_size
+        if total_song_num is None:
+            total_song_num = self.total_song_num()
+        page_starts = range(0, total_song_num, song_num)
+
+        if self.page_workers <= 1:
+            for begin in page_starts:
+                attempt = 0
+                page = self._fetch_page(begin, song_num)
+                while page is None:
+                    attempt = self._requeue_attempt(begin, attempt)
+                    page = self._fetch_page(begin, song_num, attempt)
+                yield page
+            return
+
+        with ThreadPoolExecutor(max_workers=self.page_workers) as executor:
+            in_flight = deque()  # (song_begin, attempt, future)
+            for begin in page_starts:
+                in_flight.append((begin, 0, executor.submit(self._fetch_page, begin, song_num)))
+                if len(in_flight) >= self.page_workers:
+                    yield self._next_page(executor, in_flight, song_num)
+            while in_flight:
+                yield self._next_page(executor, in_flight, song_num)
+
+    def _next_page(self, executor: ThreadPoolExecutor, in_flight: deque, song_num: int):
+        """
+        Wait for the oldest in-flight page. A failed page is re-queued at the front,
+        so pages are still yielded in playlist order.
+        """
+        while True:
+            begin, attempt, future = in_flight.popleft()
+            page = future.result()
+            if page is not None:
+                return page
+            attempt = self._requeue_attempt(begin, attempt)
+            in_flight.appendleft(
+                (begin, attempt, executor.submit(self._fetch_page, begin, song_num, attempt))
+            )
+
+    def _requeue_attempt(self, song_begin: int, attempt: int) -> int:
+        """Return the next attempt number of a failed page, or raise if it failed too often."""
+        attempt += 1
+        if attempt > self.page_retries:
+            raise RuntimeError(
+                f"Page {song_begin} of playlist {self.id} failed after {self.page_retries} retries."
+            )
+        print(
+            f"Re-queueing page {song_begin} of playlist {self.id} "
+            f"(retry {attempt}/{self.page_retries})..."
+        )
+        return attempt
+
+    def get_list(self, song_num: Optional[int] = None, total_song_num: Optional[int] = None):
+        song_list = []
+        playlist_name = None
+        for playlist_name, songs in self.iter_pages(song_num, total_song_num):
+            song_list.extend(songs)
 
         return {
             "id": self.id,
@@ -96,17 +236,131 @@ class QQMusicList:
             "songs": song_list,
         }, playlist_name
 
-    def start(self, output_dir="."):
+    def stream(self, output_dir="."):
+        """
+        Stream the playlist to an NDJSON file page by page, without keeping the songs in memory.
+        The first line holds the playlist id and name, every following line is one song.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        partial_path = os.path.join(output_dir, f"{self.id}.ndjson.part")
+        playlist_name = None
+        song_count = 0
+        try:
+            with open(partial_path, "w", encoding="utf-8") as file:
+                for playlist_name, songs in self.iter_pages():
+                    if song_count == 0:
+                        file.write(json.dumps({"id": self.id, "name": playlist_name}) + "\n")
+                    for song in songs:
+                        file.write(json.dumps(song) + "\n")
+                    song_count += len(songs)
+                    file.flush()
+        except Exception:
+            os.remove(partial_path)  # don't leave an incomplete playlist behind
+            raise
+
+        if playlist_name is None:
+            os.remove(partial_path)
+            print(f"No songs fetched for playlist {self.id}.")
+            return
+        file_name = f"{playlist_name}.ndjson"
+        os.replace(partial_path, os.path.join(output_dir, file_name))
+        print(f"file saved at: {file_name}, songs: {song_count}")
+
+    def start(self, output_dir=".", incremental: bool = False, binary: bool = False):
+        """
+        Fetch the playlist and save it as JSON, or as a compact `.qqpl` file if binary
+        (see playlist_store.py).
+        With incremental=True, the whole playlist is still fetched and compared with the stored
+        fingerprint: unchanged playlists are not saved again, and the added/removed songs are
+        written to a `.delta` file next to the JSON.
+        """
+        # if output dir not exists, create it
+        os.makedirs(output_dir, exist_ok=True)
+
+        fingerprint = PlaylistFingerprint.load(output_dir, self.id) if incremental else None
         data, playlist_name = self.get_list()
-        file_name = f"{playlist_name}.json"
+        if fingerprint is not None and fingerprint.matches(data["songs"]):
+            print(f"Playlist '{fingerprint.name}' unchanged. Skipping...")
+            return
+        if playlist_name is None:
+            # no page fetched, so no playlist name to save the file under
+            if fingerprint is None:
+                print(f"No songs fetched for playlist {self.id}.")
+                return
+            playlist_name = data["name"] = fingerprint.name  # emptied since the last fetch
+        file_name = f"{playlist_name}{EXTENSION if binary else '.json'}"
         output_path = os.path.join(output_dir, file_name)
-        # if output dir not exists, create it
-        if not os.path.exists(output_dir):
-            os.makedirs(output_dir)
-        with open(output_path, "w", encoding="utf-8") as file:
-            file.write(json.dumps(data, indent=4))
+        if binary:
+            write_playlist(output_path, data)
+        else:
+            with open(output_path, "w", encoding="utf-8") as file:
+                file.write(json.dumps(data, indent=4))
         print(f"file saved at: {file_name}, " f"songs: {len(data['songs'])}")
 
+        if incremental:
+            added, removed = diff_songs(fingerprint, data["songs"])
+            write_delta(output_dir, self.id, playlist_name, added, removed)
+            PlaylistFingerprint.from_playlist(data).save(output_dir)
+            print(f"delta: {len(added)} added, {len(removed)} removed")
+
+
+def fetch_playlists(
+    id_list,
+    output_dir: str,
+    workers: int = 4,
+    page_workers: int = 4,
+    page_size: int = 15,
+    rate: float = 10,
+    incremental: bool = False,
+    streaming: bool = False,
+    binary: bool = False,
+    pool_size: Optional[int] = None,
+    retries: int = 3,
+    timeout: Tuple[float, float] = (5, 15),
+):
+    """
+    Fetch multiple playlists concurrently over a shared session and a global rate limit.
+    With streaming=True, playlists are streamed to NDJSON files instead of JSON
+    (not supported with incremental or binary).
+    With binary=True, playlists are saved as compact `.qqpl` files instead of JSON.
+    :param pool_size: Keep-alive connections of the shared session (default: workers * page_workers).
+    :param retries: Retries of a failed request, and re-queues of a failed page.
+    :param timeout: (connect, read) timeout of every request (in seconds).
+    :return: The playlists that failed, as {playlist ID: error message}.
+    """
+    if streaming and (incremental or binary):
+        # stream() writes NDJSON page by page, without a fingerprint or a `.qqpl` file
+        raise ValueError("streaming=True can't be combined with incremental=True or binary=True.")
+    session = create_session(pool_size=pool_size or workers * page_workers, retries=retries)
+    rate_limiter = RateLimiter(rate=rate, burst=workers)
+
+    def fetch(id):
+        print(f"Fetching playlist: {id}")
+        qq_list = QQMusicList(
+            id,
+            session=session,
+            rate_limiter=rate_limiter,
+            page_size=page_size,
+            page_workers=page_workers,
+            timeout=timeout,
+            page_retries=retries,
+        )
+        if streaming:
+            qq_list.stream(output_dir)
+        else:
+            qq_list.start(output_dir, incremental=incremental, binary=binary)
+
+    failed = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(fetch, id): id for id in id_list}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Failed to fetch playlist {futures[future]}: {e}")
+                failed[futures[future]] = str(e)
+    return failed
+
 
 def read_lines(file):
     with open(file, "r") as f:
@@ -137,11 +391,33 @@ if __name__ == "__main__":
         url = validate_url(line)
         id_list.append(parse_id(url))
     print(f"Found {len(id_list)} playlist(s) to fetch.")
-    for id in id_list:
-        print("\n" + "=" * 50)
-        print(f"Fetching playlist: {id}\n")
-        qq_list = QQMusicList(id)
-        qq_list.start("data/qqmusic-raw")
-        time.sleep(0.5)  # avoid being blocked
+    # Playlists and pages are fetched concurrently. `rate` (requests per second) is shared
+    # by all workers to avoid being blocked; lower it if requests start failing.
+    # With incremental=True, every playlist is fetched and compared song by song with the last
+    # fetch: unchanged playlists are not saved again, and added/removed songs are written to
+    # `.delta` files, so youtube_music/main.py can process only the changes.
+    # With streaming=True, songs are written page by page to `.ndjson` files (constant memory),
+    # not compatible with incremental or binary.
+    # With binary=True, playlists are saved as compact `.qqpl` files, which are smaller and
+    # faster to open than JSON (run qq_music/playlist_store.py to convert existing JSON files).
+    # All requests share one pool of keep-alive connections. Failed requests (timeouts, 5xx)
+    # are retried with backoff, and a page that still fails is re-queued up to `retries` times.
+    failed = fetch_playlists(
+        id_list,
+        "data/qqmusic-raw",
+        workers=4,
+        page_workers=4,
+        page_size=15,
+        rate=10,
+        incremental=False,
+        streaming=False,
+        binary=False,
+        retries=3,
+        timeout=(5, 15),
+    )
 
+    if failed:
+        # a non-zero exit code lets fetch_qq.bat report the failure
+        print(f"\n\nFailed to fetch {len(failed)} of {len(id_list)} playlist(s): {', '.join(failed)}")
+        sys.exit(1)
     print("\n\nCompleted.")
@@ -0,0 +1,128 @@
+# Per-playlist content fingerprints for incremental QQ Music syncs.
+# A fingerprint (songs, per-song hashes, last fetch time) is stored next to the exported
+# playlist JSON, in `<playlist id>.fingerprint`. On the next fetch it's used to detect unchanged
+# playlists and to compute the added/removed songs, which are written to a `.delta` file
+# for youtube_music/main.py.
+import datetime
+import hashlib
+import json
+import os
+from typing import List, Optional
+
+
+def song_hash(song: dict) -> str:
+    """Stable hash of a song's identity (name, artists, album, duration)."""
+    key = json.dumps(
+        [song.get("name"), song.get("artists"), song.get("album"), song.get("duration")],
+        ensure_ascii=False,
+    )
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+class PlaylistFingerprint:
+    def __init__(
+        self,
+        id,
+        name: str,
+        songs: List[dict],
+        song_hashes: List[str],
+        fetched_at: Optional[str] = None,
+    ):
+        """
+        :param songs: The fingerprinted songs, so removed songs can be written to the next delta.
+        """
+        self.id = id
+        self.name = name
+        self.songs = songs
+        self.song_hashes = song_hashes
+        self.fetched_at = fetched_at or datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    @property
+    def song_count(self) -> int:
+        return len(self.song_hashes)
+
+    @classmethod
+    def from_playlist(cls, data: dict) -> "PlaylistFingerprint":
+        songs = data["songs"]
+        return cls(data["id"], data["name"], songs, [song_hash(song) for song in songs])
+
+    @staticmethod
+    def path(output_dir: str, id) -> str:
+        return os.path.join(output_dir, f"{id}.fingerprint")
+
+    @classmethod
+    def load(cls, output_dir: str, id) -> Optional["PlaylistFingerprint"]:
+        """
+        Load the fingerprint of a playlist ID from the output directory.
+        """
+        path = cls.path(output_dir, id)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(
+            data["id"], data["name"], data["songs"], data["song_hashes"], data.get("fetched_at")
+        )
+
+    def save(self, output_dir: str):
+        with open(self.path(output_dir, self.id), "w", encoding="utf-8") as f:
+            data = {
+                "id": self.id,
+                "name": self.name,
+                "song_count": self.song_count,
+                "song_hashes": self.song_hashes,
+                "fetched_at": self.fetched_at,
+                "songs": self.songs,
+            }
+            f.write(json.dumps(data, indent=4, ensure_ascii=False))
+
+    def matches(self, songs: List[dict]) -> bool:
+        """Check whether songs are exactly the fingerprinted ones, in the same order."""
+        return [song_hash(song) for song in songs] == self.song_hashes
+
+
+def diff_songs(old: Optional[PlaylistFingerprint], songs: List[dict]):
+    """
+    Return (added songs, removed songs) between a previous fingerprint and the current songs.
+    """
+    old_hashes = set(old.song_hashes) if old else set()
+    new_hashes = [song_hash(song) for song in songs]
+    added = [song for song, h in zip(songs, new_hashes) if h not in old_hashes]
+    removed_hashes = old_hashes - set(new_hashes)
+    removed = []
+    for song, h in zip(old.songs if old else [], old.song_hashes if old else []):
+        if h in removed_hashes:
+            removed.append(song)
+            removed_hashes.discard(h)  # once per song
+    return added, removed
+
+
+def write_delta(output_dir: str, id, name: str, added: List[dict], removed: List[dict]):
+    """
+    Write (or extend) the `.delta` file of a playlist with added and removed songs.
+    Deltas accumulate until they're consumed (deleted) by youtube_music/main.py.
+    """
+    path = os.path.join(output_dir, f"{name}.delta")
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+        removed_hashes = {song_hash(song) for song in removed}
+        added_hashes = {song_hash(song) for song in added}
+        previous_added_hashes = {song_hash(song) for song in previous["added"]}
+        previous_removed_hashes = {song_hash(song) for song in previous["removed"]}
+        added = [song for song in previous["added"] if song_hash(song) not in removed_hashes] + [
+            song for song in added if song_hash(song) not in previous_added_hashes
+        ]
+        removed = [
+            song for song in previous["removed"] if song_hash(song) not in added_hashes
+        ] + [song for song in removed if song_hash(song) not in previous_removed_hashes]
+
+    data = {
+        "id": id,
+        "name": name,
+        "date": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "added": added,
+        "removed": removed,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(data, indent=4))
@@ -1,26 +1,95 @@
 # Merge multiple playlists into a single playlist.
 # This is useful when you want to merge multiple playlists into a single playlist before uploading to YouTube Music.
+import glob
 import json
 import os
+import re
+import sys
+from typing import Dict, List
+
+from playlist_store import PLAYLIST_EXTENSIONS, latest_playlist_files, open_playlist
+
+# the matcher's duration parsing and normalization are reused from youtube_music/match.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "youtube_music"))
+from match import MusicMatcher, normalize, parse_duration  # noqa: E402
+
+
+def expand_inputs(inputs: List[str]) -> List[str]:
+    """
+    Expand a list of files, directories (all .json/.ndjson/.qqpl files inside) and glob patterns.
+    A playlist found in several formats is only read once, from its most recent file.
+    """
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, filenames in os.walk(item):
+                for filename in sorted(filenames):
+                    if filename.endswith(PLAYLIST_EXTENSIONS):
+                        files.append(os.path.join(root, filename))
+        else:
+            files.extend(sorted(glob.glob(item)) if glob.has_magic(item) else [item])
+    # keep order, drop files listed twice and older copies of a playlist in other formats
+    return latest_playlist_files(dict.fromkeys(files))
 
 
 class JoinJSON:
-    def __init__(self, json_files: list, new_playlist_name: str, dir: str = "."):
-        self.json_files: list = json_files
+    def __init__(
+        self,
+        json_files: list,
+        new_playlist_name: str,
+        dir: str = ".",
+        duration_tolerance: int = 2,
+        fuzzy: bool = False,
+    ):
+        """
+        :param json_files: Playlist files, directories or glob patterns to merge.
+        :param new_playlist_name: Name of the merged playlist.
+        :param dir: Output directory.
+        :param duration_tolerance: Songs with the same title and artists are duplicates
+                                   if their durations differ by at most this many seconds.
+        :param fuzzy: Also collapse near-duplicates, comparing titles with the matcher's
+                      normalization (e.g. ignoring "(TV Size)" or different album strings).
+        """
+        self.json_files: list = expand_inputs(json_files)
         self.output_file: str = os.path.join(dir, f"{new_playlist_name}.json")
         self.new_playlist_name: str = new_playlist_name
+        self.duration_tolerance = duration_tolerance
+        self.fuzzy = fuzzy
+        self._normalize = self._matcher_normalize() if fuzzy else None
+
+    @staticmethod
+    def _matcher_normalize():
+        keywords = tuple(MusicMatcher(similarity="difflib").special_keywords)
+        return lambda text: " ".join(normalize(text, keywords).parts)
+
+    def _song_key(self, song: dict) -> tuple:
+        """Hashable identity of a song: normalized title and artists (album is ignored)."""
+        if self._normalize is not None:
+            title = self._normalize(song.get("name") or "")
+            artists = tuple(sorted(self._normalize(a) for a in (song.get("artists") or [])))
+        else:
+            title = re.sub(r"\s+", " ", (song.get("name") or "").strip().lower())
+            artists = tuple(
+                sorted(re.sub(r"\s+", " ", a.strip().lower()) for a in (song.get("artists") or []))
+            )
+        return title, artists
 
     def join(self):
         result_songs = []
         ids = []
+        seen: Dict[tuple, List[int]] = {}  # song key -> durations already kept
         for file in self.json_files:
-            data = self._parse_json(file)
-            ids.append(data.get("id"))
-            songs = data.get("songs")
-            for song in songs:
-                if song not in result_songs:
-                    result_songs.append(song)
-                    print(song)
+            playlist = open_playlist(file)
+            ids.append(playlist.id)
+            for song in playlist.songs:
+                key = self._song_key(song)
+                duration = parse_duration(song.get("duration"))
+                durations = seen.setdefault(key, [])
+                if any(abs(duration - d) <= self.duration_tolerance for d in durations):
+                    continue
+                durations.append(duration)
+                result_songs.append(song)
+                print(song)
 
         return {"name": self.new_playlist_name, "id": ids, "songs": result_songs}
 
@@ -30,18 +99,16 @@ class JoinJSON:
         with open(self.output_file, "w", encoding="utf-8") as f:
             f.write(json.dumps(data, indent=4))
 
-    def _parse_json(self, file):
-        with open(file, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        return data
-
 
 if __name__ == "__main__":
-    files = [
+    # Usage: python qq_music/merge.py [files, directories or glob patterns...]
+    # e.g. python qq_music/merge.py data/qqmusic-raw "data/qqmusic-raw/*ACG*.json"
+    # Without arguments, the playlists below are merged.
+    files = sys.argv[1:] or [
         "data/qqmusic-raw/「ACG神曲」动漫中二魂不灭！.json",
         "data/qqmusic-raw/注入灵魂丨B站大佬们的宝藏歌曲.json",
     ]
-    joiner = JoinJSON(files, "anime", "data/qqmusic-joined")
+    joiner = JoinJSON(files, "anime", "data/qqmusic-joined", fuzzy=False)
     data = joiner.join()
     joiner.to_json(data)
-    print(f"Joined playlists: {files} to {joiner.output_file}")
+    print(f"Joined playlists: {joiner.json_files} to {joiner.output_file}")
@@ -0,0 +1,364 @@
+# Compact binary storage for exported playlists (`.qqpl`), an alternative to the JSON files.
+# Songs are stored column by column as little-endian uint32 arrays that index a string table,
+# so repeated artists and albums are stored once. Files are memory-mapped and songs are decoded
+# lazily, one at a time, without parsing the whole file.
+#
+# Layout:
+#   header    magic "QQPL", version (u8), 3 padding bytes, then u32: song count, artist reference
+#             count, string count, playlist id (string index, JSON-encoded), playlist name
+#             (string index)
+# String indexes are NO_STRING for None, so a JSON playlist converts back unchanged
+# (values other than None are stored as text).
+#   strings   u32 offsets[string count + 1] into the UTF-8 blob, then the blob (padded to 4 bytes)
+#   columns   u32 name[songs], album[songs], duration[songs], artist_start[songs + 1],
+#             artists[artist references]
+#
+# open_playlist() reads a playlist in any of the formats: JSON, NDJSON (qq_music/fetch.py
+# streaming mode, a header line then one song per line) or `.qqpl`.
+#
+# Usage: python qq_music/playlist_store.py  (converts the JSON files of data/qqmusic-raw)
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+MAGIC = b"QQPL"
+VERSION = 1
+EXTENSION = ".qqpl"
+NO_DURATION = 0xFFFFFFFF  # duration of songs without one
+NO_STRING = 0xFFFFFFFF  # string index of None
+
+_HEADER = struct.Struct("<4sB3x5I")
+
+# playlist file formats, preferred first when a playlist was saved in several of them
+PLAYLIST_EXTENSIONS = (EXTENSION, ".json", ".ndjson")
+
+
+class _StringTable:
+    """Interns strings while writing a playlist."""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.strings: List[str] = []
+
+    def add(self, text: Optional[str]) -> int:
+        if text is None:
+            return NO_STRING
+        text = str(text)
+        id = self.ids.get(text)
+        if id is None:
+            id = self.ids[text] = len(self.strings)
+            self.strings.append(text)
+        return id
+
+
+def _u32_array(values) -> array:
+    column = array("I", values)
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column
+
+
+def write_playlist(path: str, data: dict):
+    """
+    Write a playlist ({"id", "name", "songs": [{"name", "artists", "album", "duration"}]})
+    to a `.qqpl` file. The file is written to a temporary path, then moved into place.
+    """
+    strings = _StringTable()
+    # JSON-encoded: merged playlists (qq_music/merge.py) have a list of ids
+    playlist_id = strings.add(json.dumps(data.get("id"), ensure_ascii=False))
+    playlist_name = strings.add(data.get("name"))
+    names, albums, durations, artist_starts, artists = [], [], [], [0], []
+    for song in data.get("songs", []):
+        names.append(strings.add(song.get("name")))
+        albums.append(strings.add(song.get("album")))
+        duration = song.get("duration")
+        durations.append(NO_DURATION if duration is None else int(duration))
+        artists.extend(strings.add(artist) for artist in song.get("artists") or [])
+        artist_starts.append(len(artists))
+
+    encoded = [s.encode("utf-8") for s in strings.strings]
+    offsets = [0]
+    for s in encoded:
+        offsets.append(offsets[-1] + len(s))
+    blob = b"".join(encoded)
+    blob += b"\0" * (-len(blob) % 4)  # keep the columns aligned
+
+    partial_path = path + ".part"
+    with open(partial_path, "wb") as f:
+        f.write(
+            _HEADER.pack(
+                MAGIC,
+                VERSION,
+                len(names),
+                len(artists),
+                len(encoded),
+                playlist_id,
+                playlist_name,
+            )
+        )
+        f.write(_u32_array(offsets).tobytes())
+        f.write(blob)
+        for column in (names, albums, durations, artist_starts, artists):
+            f.write(_u32_array(column).tobytes())
+    os.replace(partial_path, path)
+
+
+class PlaylistFile:
+    """
+    Read-only view of a `.qqpl` file. Songs are decoded on access, so iterating
+    a large playlist doesn't load it into memory. Use as a context manager, or call close().
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._map = None
+        self._file = open(path, "rb")
+        try:
+            self._open()
+        except Exception:
+            self.close()
+            raise
+
+    def _open(self):
+        if os.fstat(self._file.fileno()).st_size < _HEADER.size:
+            raise ValueError(f"{self.path} is not a playlist file (too short).")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.song_count, artist_count, string_count, id_index, name_index = (
+            _HEADER.unpack_from(self._map, 0)
+        )
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.path} is not a playlist file (version {VERSION}).")
+
+        position = _HEADER.size
+        self._offsets = self._column(position, string_count + 1)
+        position += 4 * (string_count + 1)
+        self._blob_start = position
+        position += self._offsets[string_count] + (-self._offsets[string_count] % 4)
+        self._names = self._column(position, self.song_count)
+        position += 4 * self.song_count
+        self._albums = self._column(position, self.song_count)
+        position += 4 * self.song_count
+        self._durations = self._column(position, self.song_count)
+        position += 4 * self.song_count
+        self._artist_starts = self._column(position, self.song_count + 1)
+        position += 4 * (self.song_count + 1)
+        self._artists = self._column(position, artist_count)
+        self._strings: Dict[int, str] = {}  # decoded strings, repeated ones are decoded once
+
+        self.id = json.loads(self._string(id_index))
+        self.name = self._string(name_index)
+
+    def _column(self, position: int, length: int):
+        """uint32 column at position: a zero-copy view on little-endian machines."""
+        if position + 4 * length > len(self._map):
+            raise ValueError(f"{self.path} is truncated.")
+        if sys.byteorder == "little":
+            return memoryview(self._map)[position : position + 4 * length].cast("I")
+        column = array("I", self._map[position : position + 4 * length])
+        column.byteswap()
+        return column
+
+    def _string(self, index: int) -> Optional[str]:
+        if index == NO_STRING:
+            return None
+        text = self._strings.get(index)
+        if text is None:
+            start = self._blob_start + self._offsets[index]
+            end = self._blob_start + self._offsets[index + 1]
+            text = self._strings[index] = self._map[start:end].decode("utf-8")
+        return text
+
+    def __len__(self) -> int:
+        return self.song_count
+
+    def __getitem__(self, index: int) -> dict:
+        if not -self.song_count <= index < self.song_count:
+            raise IndexError("song index out of range")
+        index %= self.song_count
+        duration = self._durations[index]
+        return {
+            "name": self._string(self._names[index]),
+            "artists": [
+                self._string(self._artists[i])
+                for i in range(self._artist_starts[index], self._artist_starts[index + 1])
+            ],
+            "album": self._string(self._albums[index]),
+            "duration": None if duration == NO_DURATION else duration,
+        }
+
+    def __iter__(self) -> Iterator[dict]:
+        for index in range(self.song_count):
+            yield self[index]
+
+    def to_dict(self) -> dict:
+        """The playlist in the JSON layout written by qq_music/fetch.py."""
+        return {"id": self.id, "name": self.name, "songs": list(self)}
+
+    def close(self):
+        # release the views on the map before closing it
+        for column in ("_offsets", "_names", "_albums", "_durations", "_artist_starts", "_artists"):
+            view = getattr(self, column, None)
+            if isinstance(view, memoryview):
+                view.release()
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_playlist(path: str) -> dict:
+    """Read a whole `.qqpl` file into the JSON layout."""
+    with PlaylistFile(path) as playlist:
+        return playlist.to_dict()
+
+
+def json_to_playlist(json_path: str, path: Optional[str] = None) -> str:
+    """Convert a JSON playlist to `.qqpl` (next to it by default). Returns the new path."""
+    with open(json_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or "songs" not in data:
+        raise ValueError("not a playlist")
+    path = path or os.path.splitext(json_path)[0] + EXTENSION
+    write_playlist(path, data)
+    return path
+
+
+def playlist_to_json(path: str, json_path: Optional[str] = None) -> str:
+    """Convert a `.qqpl` playlist back to JSON (next to it by default). Returns the new path."""
+    json_path = json_path or os.path.splitext(path)[0] + ".json"
+    with open(json_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(read_playlist(path), indent=4))
+    return json_path
+
+
+def convert_directory(directory: str, remove_json: bool = False) -> List[str]:
+    """
+    Convert every JSON playlist of a directory to `.qqpl`. Files that aren't playlists
+    are skipped. With remove_json=True, the JSON files are deleted once converted.
+    """
+    converted = []
+    for root, _, filenames in os.walk(directory):
+        for filename in sorted(filenames):
+            if not filename.endswith(".json"):
+                continue
+            json_path = os.path.join(root, filename)
+            try:
+                path = json_to_playlist(json_path)
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                print(f"Skipping {json_path}: {e}")
+                continue
+            json_size, size = os.path.getsize(json_path), os.path.getsize(path)
+            print(f"{json_path} -> {path} ({json_size / 1024:.0f} KiB -> {size / 1024:.0f} KiB)")
+            if remove_json:
+                os.remove(json_path)
+            converted.append(path)
+    return converted
+
+
+
+class PlaylistSource(NamedTuple):
+    id: object
+    name: str
+    songs: Iterable[dict]
+
+
+class PlaylistSongs:
+    """
+    Songs of a `.qqpl` playlist. The file is only open while the songs are iterated,
+    so no file handle is left open once a playlist is processed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with PlaylistFile(path) as playlist:
+            self.id = playlist.id
+            self.name = playlist.name
+            self._song_count = len(playlist)
+
+    def __len__(self) -> int:
+        return self._song_count
+
+    def __iter__(self) -> Iterator[dict]:
+        with PlaylistFile(self.path) as playlist:
+            yield from playlist
+
+
+def _ndjson_header(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                return json.loads(line)
+    raise ValueError(f"{path} is empty.")
+
+
+def iter_ndjson(path: str) -> Iterator[dict]:
+    """Songs of an NDJSON playlist, read line by line (the header line is skipped)."""
+    with open(path, "r", encoding="utf-8") as f:
+        lines = (line for line in f if line.strip())
+        next(lines, None)  # header: playlist id and name
+        for line in lines:
+            yield json.loads(line)
+
+
+def open_playlist(path: str) -> PlaylistSource:
+    """
+    Open a playlist file in any format (see PLAYLIST_EXTENSIONS). The songs of `.ndjson`
+    and `.qqpl` files are read lazily; JSON files are loaded at once.
+    """
+    if path.endswith(EXTENSION):
+        songs = PlaylistSongs(path)
+        return PlaylistSource(songs.id, songs.name, songs)
+    if path.endswith(".ndjson"):
+        header = _ndjson_header(path)
+        return PlaylistSource(header.get("id"), header.get("name"), iter_ndjson(path))
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return PlaylistSource(data.get("id"), data.get("name"), data.get("songs", []))
+
+
+def latest_playlist_files(paths: Iterable[str]) -> List[str]:
+    """
+    Keep one file per playlist: when a playlist was saved in several formats (e.g. converted
+    to `.qqpl` next to its JSON file, or fetched again in another format), only the most
+    recently modified file is kept (the preferred format on a tie). Order is kept.
+    """
+    def rank(path: str) -> tuple:
+        extension = os.path.splitext(path)[1]
+        return os.path.getmtime(path), -PLAYLIST_EXTENSIONS.index(extension)
+
+    latest: Dict[str, str] = {}  # path without extension -> file
+    for path in paths:
+        stem, extension = os.path.splitext(path)
+        if extension not in PLAYLIST_EXTENSIONS:
+            latest[path] = path
+            continue
+        current = latest.get(stem)
+        if current is None or rank(path) > rank(current):
+            latest[stem] = path
+    return list(latest.values())
+
+
+def scan_playlists(directory: str) -> List[str]:
+    """Return the playlist files of a directory, one per playlist (see latest_playlist_files)."""
+    paths = []
+    for root, _, filenames in os.walk(directory):
+        for filename in sorted(filenames):
+            if filename.endswith(PLAYLIST_EXTENSIONS):
+                paths.append(os.path.join(root, filename))
+    return latest_playlist_files(paths)
+
+
+if __name__ == "__main__":
+    # Convert the playlists fetched by qq_music/fetch.py. The JSON files are kept unless
+    # remove_json=True; youtube_music/main.py and qq_music/merge.py read both formats.
+    converted = convert_directory("data/qqmusic-raw", remove_json=False)
+    print(f"Converted {len(converted)} playlists.")
@@ -0,0 +1,225 @@
+# Local catalog of the YouTube Music tracks seen in past search results.
+# Every song/video row extracted from a search is kept (persisted in SQLite), and indexed by the
+# character n-grams of its normalized title and artists. A source track is first looked up in the
+# catalog: the rows with a near-identical title and a close duration are scored with MusicMatcher,
+# and the API is only searched when none of them matches well enough.
+import heapq
+import json
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from match import Track, normalize
+
+
+_NUMBER_PATTERN = re.compile(r"\d+")
+
+
+class CatalogRow(NamedTuple):
+    video_id: str
+    title: str
+    artists: Tuple[str, ...]
+    album: str
+    duration: int
+    type: Optional[str]
+
+
+def ngrams(text: str, n: int = 2) -> Set[str]:
+    """
+    Character n-grams of the normalized parts of a string (brackets removed, lower case).
+    Parts shorter than n are kept whole, so short CJK titles are indexed too.
+    """
+    grams = set()
+    for part in normalize(text, ()).parts:
+        if len(part) <= n:
+            grams.add(part)
+        else:
+            grams.update(part[i : i + n] for i in range(len(part) - n + 1))
+    return grams
+
+
+def _numbers(text: str) -> Tuple[str, ...]:
+    """Numbers in a title ("Part 2", "2020"). Titles that differ by a number are different songs."""
+    return tuple(_NUMBER_PATTERN.findall(" ".join(normalize(text, ()).parts)))
+
+
+class TrackCatalog:
+    def __init__(
+        self,
+        path: str = "data/cache/catalog.sqlite3",
+        n: int = 2,
+        min_similarity: float = 0.8,
+        max_candidates: int = 20,
+    ):
+        """
+        :param path: Path of the SQLite database file. Use ":memory:" for a non-persistent catalog.
+        :param n: Length of the character n-grams indexed.
+        :param min_similarity: Minimum Jaccard similarity between the title n-grams of a track
+                               and of a row for the row to be a candidate. MusicMatcher accepts
+                               a title if a single word matches, which is only safe for
+                               search results, so catalog rows need a similar whole title.
+        :param max_candidates: Maximum number of rows (most shared n-grams first) scored per track.
+        """
+        self.path = path
+        self.n = n
+        self.min_similarity = min_similarity
+        self.max_candidates = max_candidates
+        self.rows: List[CatalogRow] = []
+        self._title_sizes: List[int] = []  # number of title n-grams per row
+        self._ids: Dict[str, int] = {}  # video ID -> row index
+        self._title_index: Dict[str, List[int]] = {}  # n-gram -> row indexes
+        self._artist_index: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if path != ":memory:" and directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS catalog (
+                video_id TEXT PRIMARY KEY,
+                title TEXT NOT NULL,
+                artists TEXT NOT NULL,
+                album TEXT NOT NULL,
+                duration INTEGER NOT NULL,
+                type TEXT
+            )
+            """
+        )
+        self._conn.commit()
+        for video_id, title, artists, album, duration, type in self._conn.execute(
+            "SELECT video_id, title, artists, album, duration, type FROM catalog ORDER BY rowid"
+        ):
+            row = CatalogRow(video_id, title, tuple(json.loads(artists)), album, duration, type)
+            self._index(row)
+        # Rows added during this run are stored, but only looked up from the next run on:
+        # which searches finish first varies with concurrent workers, so looking them up
+        # would make a track's match depend on the timing of the others.
+        self._lookup_rows = len(self.rows)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _index(self, row: CatalogRow):
+        index = len(self.rows)
+        self.rows.append(row)
+        self._ids[row.video_id] = index
+        title_grams = ngrams(row.title, self.n)
+        self._title_sizes.append(len(title_grams))
+        for gram in title_grams:
+            self._title_index.setdefault(gram, []).append(index)
+        for gram in set().union(*(ngrams(artist, self.n) for artist in row.artists)):
+            self._artist_index.setdefault(gram, []).append(index)
+
+    def add(self, tracks: List[Track]):
+        """
+        Add YouTube tracks (as returned by TYMusicOp._extract_yt_tracks) to the catalog.
+        Tracks already in the catalog are ignored.
+        """
+        with self._lock:
+            new_rows = []
+            for track in tracks:
+                if not track.id or track.id in self._ids:
+                    continue
+                row = CatalogRow(
+                    track.id,
+                    track.title,
+                    tuple(track.artists),
+                    track.album,
+                    track.duration,
+                    track.type,
+                )
+                self._index(row)
+                new_rows.append(row)
+            if not new_rows:
+                return
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO catalog VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        row.video_id,
+                        row.title,
+                        json.dumps(row.artists, ensure_ascii=False),
+                        row.album,
+                        row.duration,
+                        row.type,
+                    )
+                    for row in new_rows
+                ],
+            )
+            self._conn.commit()
+
+    def candidates(
+        self,
+        track: Track,
+        keywords: Optional[Tuple[str, ...]] = None,
+        max_duration_difference: Optional[int] = None,
+    ) -> List[Track]:
+        """
+        Return the catalog rows most likely to be the same song as track, as Tracks
+        ready to be scored by MusicMatcher. Rows are ranked by the similarity of their title
+        n-grams with the track's, then by the number of shared artist n-grams.
+        Rows whose title has other numbers than the track's are dropped. Only the rows
+        present when the catalog was opened are looked up.
+        :param max_duration_difference: Drop rows whose duration differs more (in seconds).
+        """
+        title_grams = ngrams(track.title, self.n)
+        if not title_grams:
+            return []
+        numbers = _numbers(track.title)
+        artist_grams = set().union(*(ngrams(artist, self.n) for artist in track.artists))
+
+        with self._lock:
+            title_counts = Counter()
+            for gram in title_grams:
+                title_counts.update(self._title_index.get(gram, ()))
+            candidates = {}
+            for index, shared in title_counts.items():
+                if index >= self._lookup_rows:
+                    continue
+                similarity = shared / (len(title_grams) + self._title_sizes[index] - shared)
+                if similarity < self.min_similarity:
+                    continue
+                if (
+                    max_duration_difference is not None
+                    and abs(self.rows[index].duration - track.duration) > max_duration_difference
+                ):
+                    continue
+                if _numbers(self.rows[index].title) != numbers:
+                    continue
+                candidates[index] = similarity
+            if not candidates:
+                return []
+            artist_counts = Counter()
+            for gram in artist_grams:
+                artist_counts.update(
+                    index for index in self._artist_index.get(gram, ()) if index in candidates
+                )
+            ranked = heapq.nsmallest(
+                self.max_candidates,
+                candidates,
+                key=lambda index: (-candidates[index], -artist_counts[index], index),
+            )
+            rows = [self.rows[index] for index in ranked]
+
+        return [
+            Track(
+                title=row.title,
+                artists=list(row.artists),
+                album=row.album,
+                duration=row.duration,
+                type=row.type,
+                id=row.video_id,
+                isYT=True,
+                keywords=keywords,
+            )
+            for row in rows
+        ]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
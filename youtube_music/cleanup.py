@@ -0,0 +1,35 @@
+# Delete or empty many YouTube Music playlists at once, e.g. to start a migration over.
+# Playlists are selected by a regex on their title and processed concurrently under a shared
+# rate limit. Run with dry_run = True first to see what would change.
+from utils.rate_limit import RateLimiter
+from ytm_ops import TYMusicOp
+
+if __name__ == "__main__":
+    # >> Regex matched against the start of the playlist titles
+    pattern = r"^anime"
+
+    # "delete" removes the playlists, "clear" only removes their songs
+    action = "delete"
+
+    # Set to False to apply the changes
+    dry_run = True
+
+    workers = 4
+    yt_op = TYMusicOp(
+        "oauth.json",
+        rate_limiter=RateLimiter(rate=2, burst=workers),
+        library_path=None,  # always download the current library before deleting anything
+    )
+
+    if action == "delete":
+        result = yt_op.remove_playlists_by_pattern(pattern, workers=workers, dry_run=dry_run)
+    elif action == "clear":
+        playlist_ids = [pl["playlistId"] for pl in yt_op.library.match(pattern)]
+        result = yt_op.clear_playlists(playlist_ids, workers=workers, dry_run=dry_run)
+    else:
+        raise ValueError(f"Unknown action: {action}")
+
+    if result is not None and result.failed:
+        print("Failed (run again to retry):")
+        for item, error in result.failed.items():
+            print(f"  {item}: {error}")
@@ -0,0 +1,153 @@
+# Checkpoint journal for migration runs.
+# Every searched track is appended to a per-playlist JSON Lines file as soon as it's processed,
+# so an interrupted run can be resumed without searching the completed tracks again.
+import json
+import os
+import re
+from typing import Dict, List, Optional
+
+
+class MigrationJournal:
+    def __init__(
+        self, playlist_name: str, directory: Optional[str] = "data/journal", resume: bool = True
+    ):
+        """
+        :param playlist_name: Name of the playlist this journal belongs to.
+        :param directory: Directory where journal files are stored. None = in-memory only.
+        :param resume: If True, load the existing journal and skip completed work.
+                       If False, start from scratch and overwrite the existing journal.
+        """
+        self.playlist_name = playlist_name
+        self.path = None
+        self.playlist_id: Optional[str] = None
+        self.completed = False
+        self._tracks: Dict[int, dict] = {}
+
+        if directory is None:
+            return
+
+        # the file is only created by the first entry, so read-only journals leave no file behind
+        self.path = os.path.join(directory, f"{self._safe_name(playlist_name)}.jsonl")
+
+        if os.path.exists(self.path):
+            if resume:
+                self._load()
+            else:
+                open(self.path, "w", encoding="utf-8").close()
+
+    @staticmethod
+    def _safe_name(name: str) -> str:
+        return re.sub(r'[\\/:*?"<>|]', "_", name)
+
+    def _load(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # partially written line from an interrupted run
+                if entry.get("type") == "track":
+                    self._tracks[entry["index"]] = entry
+                elif entry.get("type") == "playlist":
+                    self.playlist_id = entry.get("playlistId")
+                    self.completed = entry.get("status") == "completed"
+
+    def _append(self, entry: dict):
+        if self.path is None:
+            return
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def get(self, index: int, track: dict) -> Optional[dict]:
+        """
+        Return the journal entry of a track if it has already been processed.
+        """
+        entry = self._tracks.get(index)
+        if entry is None or entry["track"].get("name") != track.get("name"):
+            return None
+        return entry
+
+    def record(
+        self,
+        index: int,
+        track: dict,
+        query: str,
+        video_id: Optional[str] = None,
+        score: Optional[float] = None,
+        end_reason: Optional[str] = None,
+    ) -> dict:
+        """
+        Record the outcome of a track search.
+        """
+        entry = {
+            "type": "track",
+            "index": index,
+            "track": {
+                "name": track.get("name"),
+                "artists": track.get("artists"),
+                "album": track.get("album"),
+                "duration": track.get("duration"),
+            },
+            "query": query,
+            "videoId": video_id,
+            "score": score,
+            "status": "matched" if video_id else "not_found",
+        }
+        if end_reason:
+            entry["end_reason"] = end_reason
+        self._tracks[index] = entry
+        self._append(entry)
+        return entry
+
+    def mark_completed(self, playlist_id: str):
+        """
+        Mark the playlist as fully uploaded.
+        """
+        self.playlist_id = playlist_id
+        self.completed = True
+        self._append({"type": "playlist", "status": "completed", "playlistId": playlist_id})
+
+    @staticmethod
+    def track_key(track: dict) -> tuple:
+        """Identity of a track in the journal: name, artists, album and duration."""
+        return (
+            track.get("name"),
+            tuple(track.get("artists") or ()),
+            track.get("album"),
+            track.get("duration"),
+        )
+
+    def video_ids_by_track(self) -> Dict[tuple, str]:
+        """Return the matched video IDs keyed by track_key."""
+        return {
+            self.track_key(entry["track"]): entry["videoId"]
+            for entry in self._tracks.values()
+            if entry["status"] == "matched"
+        }
+
+    def video_ids(self) -> List[str]:
+        """Return the matched video IDs in playlist order."""
+        return [
+            self._tracks[i]["videoId"]
+            for i in sorted(self._tracks)
+            if self._tracks[i]["status"] == "matched"
+        ]
+
+    def not_found_tracks(self) -> List[dict]:
+        """Return the tracks that could not be matched, with their last query and reason."""
+        tracks = []
+        for i in sorted(self._tracks):
+            entry = self._tracks[i]
+            if entry["status"] != "not_found":
+                continue
+            track = dict(entry["track"])
+            track["query"] = entry["query"]
+            track["end_reason"] = entry.get("end_reason", "")
+            tracks.append(track)
+        return tracks
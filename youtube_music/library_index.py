@@ -0,0 +1,135 @@
+# Index of the library playlists, built once per run instead of downloading the whole
+# library for every lookup. Kept up to date locally when playlists are created or deleted,
+# optionally persisted to disk and refreshed after a TTL.
+import json
+import os
+import re
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.metrics import Metrics
+
+
+class PlaylistIndex:
+    def __init__(
+        self,
+        api,
+        path: Optional[str] = None,
+        ttl: Optional[float] = 3600,
+        metrics: Optional[Metrics] = None,
+    ):
+        """
+        :param api: YTMusic instance used to download the library playlists.
+        :param path: Optional JSON file to persist the index between runs. None = in-memory only.
+        :param ttl: Time (in seconds) before the index is downloaded again. None = never.
+        :param metrics: Optional metrics recording the time spent downloading the library.
+        """
+        self.api = api
+        self.metrics = metrics
+        self.path = path
+        self.ttl = ttl
+        self.fetched_at: Optional[float] = None
+        self._playlists: List[dict] = []  # [{"title": ..., "playlistId": ...}] in library order
+        self._by_title: Dict[str, str] = {}
+
+        if path and os.path.exists(path):
+            self._load()
+
+    def _load(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self.fetched_at = data.get("fetched_at")
+        self._set_playlists(data.get("playlists", []))
+
+    def _save(self):
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with open(self.path, "w", encoding="utf-8") as f:
+            data = {"fetched_at": self.fetched_at, "playlists": self._playlists}
+            f.write(json.dumps(data, indent=4, ensure_ascii=False))
+
+    def _set_playlists(self, playlists: List[dict]):
+        self._playlists = [
+            {"title": pl["title"], "playlistId": pl["playlistId"]} for pl in playlists
+        ]
+        self._by_title = {}
+        for pl in self._playlists:
+            self._by_title.setdefault(pl["title"], pl["playlistId"])
+
+    def _is_stale(self) -> bool:
+        if self.fetched_at is None:
+            return True
+        return self.ttl is not None and time.time() - self.fetched_at > self.ttl
+
+    def refresh(self, force: bool = False):
+        """
+        Download the library playlists if the index is missing, stale or force is set.
+        """
+        if not force and not self._is_stale():
+            return
+        if self.metrics is not None:
+            with self.metrics.timer("api.get_library_playlists"):
+                playlists = self.api.get_library_playlists(10000)
+        else:
+            playlists = self.api.get_library_playlists(10000)
+        self._set_playlists(playlists)
+        self.fetched_at = time.time()
+        self._save()
+
+    @property
+    def playlists(self) -> List[dict]:
+        self.refresh()
+        return list(self._playlists)
+
+    def find(self, name: str) -> Optional[str]:
+        """
+        Return the ID of the playlist titled `name`. Falls back to the first title containing `name`.
+        """
+        self.refresh()
+        playlist_id = self._by_title.get(name)
+        if playlist_id is not None:
+            return playlist_id
+        for pl in self._playlists:
+            if name in pl["title"]:
+                return pl["playlistId"]
+        return None
+
+    def get(self, name: str) -> Optional[str]:
+        """Return the ID of the playlist titled exactly `name`."""
+        self.refresh()
+        return self._by_title.get(name)
+
+    def find_prefix(self, prefix: str) -> List[dict]:
+        """Return all playlists whose title starts with `prefix`."""
+        self.refresh()
+        return [pl for pl in self._playlists if pl["title"].startswith(prefix)]
+
+    def match(self, pattern: str) -> List[dict]:
+        """Return all playlists whose title matches the regex `pattern` (re.match semantics)."""
+        self.refresh()
+        regex = re.compile(pattern)
+        return [pl for pl in self._playlists if regex.match(pl["title"])]
+
+    def add(self, title: str, playlist_id: str):
+        """Record a newly created playlist."""
+        self.add_many([(title, playlist_id)])
+
+    def add_many(self, playlists: Iterable[Tuple[str, str]]):
+        """Record newly created playlists, given as (title, playlist ID), saving the index once."""
+        for title, playlist_id in playlists:
+            self._playlists.insert(0, {"title": title, "playlistId": playlist_id})
+            self._by_title[title] = playlist_id
+        self._save()
+
+    def remove(self, playlist_id: str):
+        """Forget a deleted playlist."""
+        self.remove_many([playlist_id])
+
+    def remove_many(self, playlist_ids: Iterable[str]):
+        """Forget deleted playlists, saving the index once."""
+        removed = set(playlist_ids)
+        self._set_playlists([pl for pl in self._playlists if pl["playlistId"] not in removed])
+        self._save()
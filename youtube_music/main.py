@@ -1,19 +1,24 @@
 # Read json files from data/qqmusic-raw and search for the corresponding songs on YouTube Music
 # and add them to the playlist with the same name.
+import glob
 import json
 import os
-from typing import List
+import sys
+import time
+from itertools import islice
+from typing import Iterable, Iterator, List, Set, Tuple
 
+from catalog import TrackCatalog
+from journal import MigrationJournal
+from resolved_tracks import ResolvedTrackStore
+from search_cache import SearchCache
+from utils.metrics import Metrics
+from utils.rate_limit import RateLimiter
 from ytm_ops import TYMusicOp
 
-
-def scan_files(dir: str):
-    files = []
-    for root, _, filenames in os.walk(dir):
-        for filename in filenames:
-            if filename.endswith(".json"):
-                files.append(os.path.join(root, filename))
-    return files
+# playlist files are read with qq_music/playlist_store.py (JSON, NDJSON and `.qqpl`)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "qq_music"))
+from playlist_store import open_playlist, scan_playlists  # noqa: E402
 
 
 def read_json(file: str):
@@ -21,43 +26,224 @@ def read_json(file: str):
         return json.load(f)
 
 
+def batched(iterable: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def get_or_create_playlist(yt_op: TYMusicOp, playlist_name: str) -> Tuple[str, Set[str]]:
+    """Return the playlist ID and the video IDs already in the playlist."""
+    # Search for existing playlist if exists
+    try:
+        # append songs to existing playlist
+        playlist_id, existing_video_ids = yt_op.find_playlist(playlist_name)
+        print(f"Playlist '{playlist_name}' found. Appending songs...")
+
+        # # uncomment the following line to delete the existing playlist and create a new one
+        # print(f"Playlist '{playlist_name}' found. Deleting playlist...")
+        # yt_op.remove_playlists(playlist_id, no_confirm=True)
+        # playlist_id, existing_video_ids = yt_op.create_playlist(playlist_name), []
+        # print(f"Playlist '{playlist_name}' re-created.")
+    except ValueError:
+        print(f"Playlist {playlist_name} not found. Creating new playlist...")
+        playlist_id, existing_video_ids = yt_op.create_playlist(playlist_name), []
+    return playlist_id, set(existing_video_ids)
+
+
+def delta_path(file: str) -> str:
+    """Path of the `.delta` file written by qq_music/fetch.py in incremental mode."""
+    return os.path.splitext(file)[0] + ".delta"
+
+
+def removed_video_ids(
+    playlist_name: str, removed: List[dict], songs: Iterable[dict]
+) -> List[str]:
+    """
+    Video IDs of the songs removed from a QQ playlist (listed in its `.delta` file), looked up
+    in the journals of the full and incremental runs, including the current delta's. Songs that
+    were never migrated are ignored, and so are video IDs also matched by one of `songs`,
+    the songs currently in the playlist.
+    """
+    removed_keys = {MigrationJournal.track_key(track) for track in removed}
+    current_keys = {MigrationJournal.track_key(track) for track in songs}
+    video_ids, kept_video_ids = set(), set()
+    pattern = f"{glob.escape(MigrationJournal._safe_name(playlist_name))}.delta*.jsonl"
+    journal_names = [playlist_name] + [
+        os.path.basename(path)[: -len(".jsonl")]
+        for path in glob.glob(os.path.join("data/journal", pattern))
+    ]
+    for journal_name in journal_names:
+        journal = MigrationJournal(journal_name, "data/journal", resume=True)
+        for key, video_id in journal.video_ids_by_track().items():
+            if key in current_keys:
+                kept_video_ids.add(video_id)
+            elif key in removed_keys:
+                video_ids.add(video_id)
+    return sorted(video_ids - kept_video_ids)
+
+
 if __name__ == "__main__":
     # >> Change this to the directory where your JSON files are stored. Default is "data/qqmusic-raw"
-    files = scan_files("data/qqmusic-raw")
+    files = scan_playlists("data/qqmusic-raw")
     # files = ["data/qqmusic-convert/anime.json"]
     print(f"Found {len(files)} files.")
 
-    yt_op = TYMusicOp("oauth.json", language="en")
+    # Search results are cached on disk so re-runs don't search the same songs again.
+    # Set bypass=True to refresh the cached results, or call cache.invalidate() to clear it.
+    cache = SearchCache("data/cache/ytmusic-search.sqlite3")
+    # cache = None  # uncomment to disable the search cache
+
+    # Songs matched once (same title, artists and duration, in any playlist or run) are resolved
+    # from this store without searching. Entries are ignored when the matcher settings change.
+    resolved = ResolvedTrackStore("data/cache/resolved-tracks.sqlite3")
+    # resolved = None  # uncomment to always search and match every song
+
+    # Every track seen in search results is kept in a local catalog. Songs are matched against it
+    # first, and only searched on YouTube Music when no catalog track scores catalog_min_score.
+    # Tracks added to the catalog during a run are only looked up from the next run on.
+    catalog = TrackCatalog("data/cache/catalog.sqlite3")
+    # catalog = None  # uncomment to always search YouTube Music
+
+    # Number of concurrent searches. Searches share a rate limit (calls per second) to avoid throttling.
+    workers = 8
+    rate_limiter = RateLimiter(rate=5, burst=workers)
+
+    # Set to True to resume an interrupted run: playlists and tracks already recorded
+    # in data/journal are skipped. False = start over from scratch.
+    resume = False
+
+    # Set to True to only process the songs added since the last incremental fetch
+    # (the `.delta` files written by qq_music/fetch.py). Playlists without a delta are skipped.
+    # Songs removed from a QQ playlist are removed from the YouTube Music playlist too.
+    incremental = False
+
+    # Set to True to add songs to the playlist in batches while the rest is still being searched.
+    streaming = False
+    batch_size = 50
+
+    # Timers and counters of the API calls and matching stages, written to data/metrics at the end
+    metrics = Metrics()
+
+    # The library playlists are downloaded once per run. Set library_path (for example
+    # "data/cache/library-playlists.json") to keep them between runs for library_ttl seconds;
+    # a playlist deleted meanwhile is detected, and the library downloaded again.
+    yt_op = TYMusicOp(
+        "oauth.json",
+        language="en",
+        cache=cache,
+        rate_limiter=rate_limiter,
+        library_path=None,
+        library_ttl=3600,
+        # skip the simple (fallback) query when the detailed results score below this value
+        skip_fallback_below=None,
+        metrics=metrics,
+        # print a progress line (tracks/s, ETA) every 10 seconds. None = disabled
+        progress_interval=10,
+        resolved=resolved,
+        catalog=catalog,
+        catalog_min_score=0.6,
+        # "auto" = rapidfuzz when installed, "difflib" reproduces the scores of earlier versions
+        similarity="auto",
+    )
     for file in files:
-        qq_data = read_json(file)
-        tracks: List[dict] = qq_data["songs"]
-        playlist_name: str = qq_data["name"]
+        playlist = open_playlist(file)
+        playlist_name, songs = playlist.name, playlist.songs
+        tracks = songs
         print(f"Processing: {playlist_name}")
 
-        video_ids = yt_op.search_songs(tracks, tolerance=0.3, playlist_name=playlist_name)
+        journal_name = playlist_name
+        if incremental:
+            if not os.path.exists(delta_path(file)):
+                print(f"Playlist '{playlist_name}' unchanged. Skipping...")
+                continue
+            delta = read_json(delta_path(file))
+            tracks = delta["added"]
+            # one journal per delta, so the video IDs of earlier deltas can still be removed
+            journal_name = f"{playlist_name}.delta-{delta['date']}"
+            print(f"Delta: {len(tracks)} added, {len(delta['removed'])} removed.")
 
-        if not video_ids:
-            print(f"No songs found. Skipping playlist {playlist_name}...")
+        journal = MigrationJournal(journal_name, "data/journal", resume=resume)
+        if journal.completed:
+            print(f"Playlist '{playlist_name}' already completed. Skipping...")
             continue
 
-        # Search for existing playlist if exists
         playlist_id = None
-        try:
-            # append songs to existing playlist
-            playlist_id = yt_op.get_playlist_id(playlist_name)
-            print(f"Playlist '{playlist_name}' found. Appending songs...")
-            
-            # # uncomment the following line to delete the existing playlist and create a new one
-            # playlist_id = yt_op.get_playlist_id(playlist_name)
-            # print(f"Playlist '{playlist_name}' found. Deleting playlist...")
-            # yt_op.remove_playlists(playlist_id, no_confirm=True)
-            # playlist_id = yt_op.create_playlist(playlist_name)
-            # print(f"Playlist '{playlist_name}' re-created.")
-        except ValueError:
-            print(f"Playlist {playlist_name} not found. Creating new playlist...")
-            playlist_id = yt_op.create_playlist(playlist_name)
-
-        yt_op.add_playlist_items(playlist_id, video_ids)
+        failed_video_ids = []
+        if streaming:
+            # flush additions in batches as matches arrive
+            video_ids = yt_op.iter_search_songs(
+                tracks, tolerance=0.3, playlist_name=playlist_name, workers=workers, journal=journal
+            )
+            existing_video_ids = None
+            for batch in batched(video_ids, batch_size):
+                if playlist_id is None:
+                    playlist_id, existing_video_ids = get_or_create_playlist(yt_op, playlist_name)
+                failed_video_ids += yt_op.add_playlist_items(
+                    playlist_id, batch, existing_video_ids=existing_video_ids
+                )
+        else:
+            video_ids = yt_op.search_songs(
+                tracks, tolerance=0.3, playlist_name=playlist_name, workers=workers, journal=journal
+            )
+            if video_ids:
+                playlist_id, existing_video_ids = get_or_create_playlist(yt_op, playlist_name)
+                failed_video_ids = yt_op.add_playlist_items(
+                    playlist_id, video_ids, existing_video_ids=existing_video_ids
+                )
+
+        # after the search: a removed song's video ID may also be matched by a song of this
+        # delta (e.g. the same song re-added with another album), which must stay
+        removed_ids = removed_video_ids(playlist_name, delta["removed"], songs) if incremental else []
+        if removed_ids:
+            try:
+                playlist_id = playlist_id or yt_op.find_playlist(playlist_name)[0]
+                removed_count = yt_op.remove_playlist_items(playlist_id, removed_ids)
+                print(f"{removed_count} removed songs deleted from '{playlist_name}'.")
+            except ValueError:
+                pass  # playlist never created, nothing to remove
+            except Exception as e:
+                # keep the delta so the next run retries the removal
+                print(f"Failed to remove songs from '{playlist_name}': {e}")
+                continue
+
+        if playlist_id is None:
+            print(f"No songs found. Skipping playlist {playlist_name}...")
+            if incremental:
+                os.remove(delta_path(file))
+            continue
+
+        if failed_video_ids:
+            # leave the journal open so a resumed run retries the failed songs
+            print(f"{len(failed_video_ids)} songs could not be added to '{playlist_name}'.")
+            continue
+        journal.mark_completed(playlist_id)
+        if incremental:
+            os.remove(delta_path(file))  # delta consumed
         print(f"Playlist '{playlist_name}' updated.")
 
     print("All playlists updated.")
+    # API searches saved per strategy (deduplicated queries, cache hits, skipped fallbacks)
+    print(f"Search queries: {yt_op.query_stats}")
+    print(f"Similarity cache: {yt_op.similarity_cache_stats()}")
+    if cache is not None:
+        print(f"Search cache: {cache.stats()}")
+        metrics.count("cache.hits", cache.hits)
+        metrics.count("cache.misses", cache.misses)
+        cache.close()
+    if resolved is not None:
+        print(f"Resolved tracks: {resolved.stats()}")
+        resolved.close()
+    if catalog is not None:
+        print(f"Catalog: {len(catalog)} tracks")
+        catalog.close()
+
+    os.makedirs("data/metrics", exist_ok=True)
+    metrics_path = f"data/metrics/run-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    metrics.to_json(metrics_path)
+    print(f"Run metrics saved at: {metrics_path}")
+    for name, timer in metrics.summary()["timers"].items():
+        print(
+            f"  {name:<28} {timer['count']:>7} calls, {timer['total']:>8.1f}s total, "
+            f"p90 {timer['p90'] * 1000:.0f} ms"
+        )
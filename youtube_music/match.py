@@ -1,9 +1,244 @@
-import difflib
 import re
-from typing import Dict, List, Optional
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+
+from similarity import get_engine
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed for MusicMatcher.score_matrix
+    np = None
+
+# Precompiled patterns used by the normalization layer
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+_BRACKETS_PATTERN = re.compile(r"\((.*?)\)|\[(.*?)\]")
+_QUOTES_PATTERN = re.compile(r'"(.*?)"|「(.*?)」')
+_SEPARATORS_PATTERN = re.compile(r"[\s\-\(\)]+")
+
+
+class StringTable:
+    """
+    Interns strings to small integer ids, so pairs of strings can be keyed by a single integer.
+    """
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def intern(self, text: str) -> int:
+        id = self._ids.get(text)
+        if id is None:
+            with self._lock:
+                id = self._ids.setdefault(text, len(self._ids))
+        return id
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+_strings = StringTable()  # every distinct string normalized
+
+
+class NormalizedString(NamedTuple):
+    """Tokenized representation of a title, artist or album, computed once per string."""
+
+    id: int  # interned id of the original string
+    text: str  # original string
+    parts: Tuple[str, ...]  # normalized phrases compared against each other
+    has_keyword: bool  # whether any special keyword appears in the string
+    charsets: Tuple[FrozenSet[str], ...]  # characters of each part, for the candidate prefilter
+
+
+def _normalize_string(s: str) -> str:
+    """Normalize strings by stripping, lowering case, and collapsing whitespace."""
+    return _WHITESPACE_PATTERN.sub(" ", s.strip().lower())
+
+
+def _clean_title(title: str, keywords: Tuple[str, ...]) -> str:
+    """Remove text inside parentheses or brackets unless they contain special keywords."""
+
+    def replace_func(match):
+        content = match.group(0)  # Includes the parentheses/brackets
+        inner_content = match.group(1)  # Inside the parentheses
+
+        if inner_content and any(keyword in inner_content for keyword in keywords):
+            return content  # Keep it if it contains a special keyword
+        else:
+            return ""  # Remove it if no special keyword is found
+
+    return _BRACKETS_PATTERN.sub(replace_func, title.lower()).strip()
+
+
+def _split_title(title: str, keywords: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Splits the title into phrases, prioritizing quoted sections."""
+    # Clean up irrelevant parts in parentheses or brackets
+    title_cleaned = _clean_title(title, keywords)
+
+    # Extract content inside quotation marks (Japanese or English style)
+    phrases = _QUOTES_PATTERN.findall(title_cleaned)
+    if phrases:
+        # Flatten list of phrases extracted from quotes
+        phrases = [p for sublist in phrases for p in sublist if p]
+    else:
+        # Split by spaces and special characters if no quotes are found
+        phrases = _SEPARATORS_PATTERN.split(title_cleaned)
+
+    return tuple(_normalize_string(p) for p in phrases if p)
+
+
+@lru_cache(maxsize=65536)
+def normalize(text: str, keywords: Tuple[str, ...]) -> NormalizedString:
+    """
+    Tokenize a string for matching. Memoized, so each distinct string is only processed once.
+    """
+    text_lower = text.lower()
+    parts = _split_title(text, keywords)
+    return NormalizedString(
+        id=_strings.intern(text),
+        text=text,
+        parts=parts,
+        has_keyword=any(keyword in text_lower for keyword in keywords),
+        charsets=tuple(frozenset(part) for part in parts),
+    )
+
+
+def _similarity_bound(norm1: NormalizedString, norm2: NormalizedString) -> float:
+    """
+    Cheap upper bound of MusicMatcher._similar_normalized(norm1, norm2).score, valid for
+    every similarity engine: parts without a common character have a ratio of 0, and the
+    ratio of the others can't exceed 2 * min(len1, len2) / (len1 + len2).
+    """
+    if norm1.text == norm2.text:
+        return 1.0
+
+    bound = 0.0
+    for part1, chars1 in zip(norm1.parts, norm1.charsets):
+        for part2, chars2 in zip(norm2.parts, norm2.charsets):
+            if chars1.isdisjoint(chars2) and (chars1 or chars2):
+                continue
+            length = len(part1) + len(part2)
+            ratio = 2.0 * min(len(part1), len(part2)) / length if length else 1.0
+            if ratio > bound:
+                bound = ratio
+
+    if norm1.has_keyword and norm2.has_keyword:
+        bound *= 1.5  # same boost as _similar_normalized
+    return bound
+
+
+class Similarity(NamedTuple):
+    score: float
+    vetoed: bool  # a special keyword is only present in the candidate
+
+
+class SimilarityCache:
+    """
+    Bounded cache of the similarity of pairs of normalized strings, keyed by their interned ids.
+    The least recently used pairs are evicted first. Thread-safe.
+    """
+
+    def __init__(self, max_entries: int = 100000):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[int, Similarity]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(norm1: NormalizedString, norm2: NormalizedString) -> int:
+        return norm1.id << 32 | norm2.id
+
+    def get(self, key: int) -> Optional[Similarity]:
+        with self._lock:
+            similarity = self._entries.get(key)
+            if similarity is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return similarity
+
+    def set(self, key: int, similarity: Similarity):
+        with self._lock:
+            self._entries[key] = similarity
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and the number of cached pairs."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+class TrackComparison(NamedTuple):
+    """Unweighted component similarities of a track/candidate comparison."""
+
+    title: float
+    artist: float
+    album: float
+    duration: float
+    vetoed: bool
+
+
+class NormalizedTrack(NamedTuple):
+    title: NormalizedString
+    artists: Tuple[NormalizedString, ...]
+    album: NormalizedString
+    has_keyword: bool  # a special keyword appears in the title, an artist or the album
+
+
+def parse_duration(duration: Optional[int | float | str]) -> int:
+    """Return a duration in whole seconds, from seconds or a "m:ss" / "h:mm:ss" string."""
+    if isinstance(duration, str):
+        seconds = 0
+        for part in duration.split(":"):
+            seconds = seconds * 60 + int(part)
+        return seconds
+    return int(duration or 0)
+
+
+def _normalize_track(
+    title: str, artists: List[str], album: str, keywords: Tuple[str, ...]
+) -> NormalizedTrack:
+    norm_title = normalize(title, keywords)
+    norm_artists = tuple(normalize(artist, keywords) for artist in artists)
+    norm_album = normalize(album, keywords)
+    return NormalizedTrack(
+        title=norm_title,
+        artists=norm_artists,
+        album=norm_album,
+        has_keyword=norm_title.has_keyword
+        or norm_album.has_keyword
+        or any(artist.has_keyword for artist in norm_artists),
+    )
 
 
 class Track:
+    # Tracks are created for every search result, so they use slots instead of a __dict__
+    __slots__ = (
+        "title",
+        "artists",
+        "album",
+        "duration",
+        "type",
+        "id",
+        "isYT",
+        "isTopResult",
+        "score",
+        "_keywords",
+        "_normalized",
+    )
+
     def __init__(
         self,
         title: str,
@@ -14,7 +249,13 @@ class Track:
         id: Optional[str] = None,
         isYT: bool = False,
         isTopResult: bool = False,
+        keywords: Optional[Tuple[str, ...]] = None,
     ):
+        """
+        :param duration: Duration in seconds, or a "m:ss" string. Stored as an integer.
+        :param keywords: Special keywords of the matcher (MusicMatcher.keywords). If given,
+                         the title, artists and album are normalized once, here.
+        """
         self.title = title
         self.artists = artists
         self.album = album
@@ -23,14 +264,23 @@ class Track:
         self.isYT = isYT
         self.isTopResult = isTopResult
         self.score = 0.0
-        if isinstance(duration, str):
-            self.duration = self._minutes_to_seconds(duration)
-        else:
-            self.duration = duration
+        self.duration = parse_duration(duration)
+        self._keywords: Optional[Tuple[str, ...]] = None
+        self._normalized: Optional[NormalizedTrack] = None
+        if keywords is not None:
+            self.normalized(keywords)
 
-    def _minutes_to_seconds(self, minutes_str: str) -> int:
-        minutes, seconds = map(int, minutes_str.split(":"))
-        return minutes * 60 + seconds
+    def normalized(self, keywords: Tuple[str, ...]) -> NormalizedTrack:
+        """
+        Return the normalized title, artists and album. They are computed once and
+        recomputed only if the track is compared with different keywords.
+        """
+        if self._normalized is None or (
+            keywords is not self._keywords and keywords != self._keywords
+        ):
+            self._normalized = _normalize_track(self.title, self.artists, self.album, keywords)
+            self._keywords = keywords
+        return self._normalized
 
     def __str__(self) -> str:
         return f"Track(title: {self.title}, artists: {self.artists}, album: {self.album}, duration: {self.duration}, type:{self.type}, id: {self.id})"
@@ -48,12 +298,23 @@ class MusicMatcher:
             "live",
             "cover",
         ],
+        similarity: str = "auto",
+        prefilter: bool = True,
+        pair_cache_size: Optional[int] = 100000,
     ):
         """
         :param tolerance: Similarity tolerance for matching (0.0 to 1.0) higher = stricter
         :param duration_threshold: Allowed difference in duration between tracks (in seconds) higher = stricter
         :param top_result_multiplier: Multiplier for top result tracks to increase their similarity score
         :param special_keywords: List of keywords that should increase or decrease similarity scores.
+        :param similarity: String similarity engine: "auto", "indel" (fast, requires rapidfuzz)
+                           or "difflib" (reproduces the original scores exactly).
+        :param prefilter: Reject candidates with cheap checks (keyword veto, upper bounds from
+                          duration, length and shared characters) before the full comparison.
+                          The best match and its score are the same as without it.
+        :param pair_cache_size: Number of (artist, artist) and (album, album) similarities kept
+                                in memory. Artists and albums repeat across a library, so most
+                                comparisons become lookups. None or 0 = no cache.
         """
         self.tolerance = tolerance
         self.duration_threshold = duration_threshold
@@ -61,89 +322,96 @@ class MusicMatcher:
         self.special_keywords = [
             keyword.lower() for keyword in special_keywords
         ]  # Normalize to lowercase
-        self._skip = False  # flag to skip the current track
+        self._keywords = tuple(self.special_keywords)  # hashable key for the normalization cache
+        self._engine = get_engine(similarity)
+        self.prefilter = prefilter
+        self._pair_cache = SimilarityCache(pair_cache_size) if pair_cache_size else None
+
+    @property
+    def keywords(self) -> Tuple[str, ...]:
+        """Special keywords, to normalize tracks up front with Track(keywords=...)."""
+        return self._keywords
+
+    @property
+    def params(self) -> dict:
+        """Settings that decide which candidate is chosen and its score."""
+        return {
+            "tolerance": self.tolerance,
+            "duration_threshold": self.duration_threshold,
+            "top_result_multiplier": self.top_result_multiplier,
+            "special_keywords": list(self._keywords),
+            "similarity": self._engine.name,
+        }
 
     def _normalize_string(self, s: str) -> str:
         """Normalize strings by stripping, lowering case, and removing special characters."""
-        return re.sub(r"\s+", " ", s.strip().lower())
+        return _normalize_string(s)
 
     def _clean_title(self, title: str) -> str:
         """Remove text inside parentheses or brackets unless they contain special keywords."""
-        # Normalize title
-        title_lower = title.lower()
-
-        # Function to decide whether to keep or remove parentheses/brackets content
-        def replace_func(match):
-            content = match.group(0)  # Includes the parentheses/brackets
-            inner_content = match.group(1)  # Inside the parentheses/brackets
-
-            if inner_content and any(keyword in inner_content for keyword in self.special_keywords):
-                return content  # Keep it if it contains a special keyword
-            else:
-                return ""  # Remove it if no special keyword is found
-
-        # Adjusted pattern to capture inner content of parentheses or brackets
-        pattern = re.compile(r"\((.*?)\)|\[(.*?)\]")
-        title_cleaned = pattern.sub(replace_func, title_lower)
-        return title_cleaned.strip()
-
-
-        # Adjusted pattern to capture inner content
-        pattern = re.compile(r"\((.*?)\)|\[(.*?)\]")
-        title_cleaned = pattern.sub(replace_func, title_lower)
-        return title_cleaned.strip()
+        return _clean_title(title, self._keywords)
 
     def _keyword_in_title(self, title: str) -> bool:
         """Check if any special keyword is present in the title, ignoring case."""
-        title_lower = title.lower()  # Convert title to lowercase
-        return any(keyword in title_lower for keyword in self.special_keywords)
+        return normalize(title, self._keywords).has_keyword
 
     def _split_title(self, title: str) -> List[str]:
         """Splits the title into phrases, prioritizing quoted sections."""
-        # Clean up irrelevant parts in parentheses or brackets
-        title_cleaned = self._clean_title(title)
-
-        # Extract content inside quotation marks (Japanese or English style)
-        phrases = re.findall(r'"(.*?)"|「(.*?)」', title_cleaned)  # Handle both types of quotes
-        if phrases:
-            # Flatten list of phrases extracted from quotes
-            phrases = [p for sublist in phrases for p in sublist if p]
-        else:
-            # Split by spaces and special characters if no quotes are found
-            phrases = re.split(r"[\s\-\(\)]+", title_cleaned)
-
-        # Normalize the phrases (lowercasing, etc.)
-        return [self._normalize_string(p) for p in phrases if p]
+        return list(normalize(title, self._keywords).parts)
 
     def _similar_strings(self, str1: str, str2: str) -> float:
         """Calculate similarity between two strings, adjusting score for keyword presence."""
         if str1 == str2:
             return 1.0
+        return self._similar_normalized(
+            normalize(str1, self._keywords), normalize(str2, self._keywords)
+        ).score
 
-        # Split and clean both strings
-        parts1 = self._split_title(str1)
-        parts2 = self._split_title(str2)
+    def _similar_normalized(self, norm1: NormalizedString, norm2: NormalizedString) -> Similarity:
+        """
+        Calculate similarity between two normalized strings, adjusting score for keyword presence.
+        The result is vetoed if a special keyword is only present in the candidate (norm2).
+        """
+        if norm1.text == norm2.text:
+            return Similarity(1.0, False)
 
         best_similarity = 0.0
-        for part1 in parts1:
-            for part2 in parts2:
-                similarity = difflib.SequenceMatcher(None, part1, part2).ratio()
-                best_similarity = max(best_similarity, similarity)
+        ratio_above = self._engine.ratio_above
+        for part1 in norm1.parts:
+            for part2 in norm2.parts:
+                # only pairs that can beat the current best are fully compared
+                similarity = ratio_above(part1, part2, best_similarity)
+                if similarity > best_similarity:
+                    best_similarity = similarity
 
         # Adjust score based on keyword presence
-        keyword_in_original = self._keyword_in_title(str1)
-        keyword_in_candidate = self._keyword_in_title(str2)
-
-        if keyword_in_candidate and not keyword_in_original:
+        vetoed = False
+        if norm2.has_keyword and not norm1.has_keyword:
             best_similarity = 0  # Set score to 0 if keyword is only in the candidate
-            self._skip = True
-        elif keyword_in_original and keyword_in_candidate:
+            vetoed = True
+        elif norm1.has_keyword and norm2.has_keyword:
             best_similarity *= 1.5  # Increase score if both have the same keyword
 
         if best_similarity < 0.3:  # threshold to return 0.0 for low similarity
             best_similarity = 0.0
 
-        return best_similarity
+        return Similarity(best_similarity, vetoed)
+
+    def _similar_cached(self, norm1: NormalizedString, norm2: NormalizedString) -> Similarity:
+        """_similar_normalized through the pair cache, for artists and albums."""
+        if self._pair_cache is None:
+            return self._similar_normalized(norm1, norm2)
+        key = SimilarityCache.key(norm1, norm2)
+        similarity = self._pair_cache.get(key)
+        if similarity is None:
+            similarity = self._similar_normalized(norm1, norm2)
+            self._pair_cache.set(key, similarity)
+        return similarity
+
+    def similarity_cache_stats(self) -> dict:
+        """Hit rate of the artist/album similarity cache, and the number of interned strings."""
+        stats = self._pair_cache.stats() if self._pair_cache is not None else {}
+        return dict(stats, interned_strings=len(_strings))
 
     def _similar_duration(self, dur1: float, dur2: float) -> float:
         """
@@ -161,12 +429,75 @@ class MusicMatcher:
 
     def _similar_artists(self, artists1: List[str], artists2: List[str]) -> float:
         """Calculate the similarity between two lists of artists."""
+        return self._similar_normalized_artists(
+            [normalize(artist, self._keywords) for artist in artists1],
+            [normalize(artist, self._keywords) for artist in artists2],
+        ).score
+
+    def _similar_normalized_artists(
+        self, artists1: Tuple[NormalizedString, ...], artists2: Tuple[NormalizedString, ...]
+    ) -> Similarity:
         best_similarity = 0.0
+        vetoed = False
         for artist1 in artists1:
             for artist2 in artists2:
-                similarity = self._similar_strings(artist1, artist2)
-                best_similarity = max(best_similarity, similarity)
-        return best_similarity
+                similarity = self._similar_cached(artist1, artist2)
+                best_similarity = max(best_similarity, similarity.score)
+                vetoed = vetoed or similarity.vetoed
+        return Similarity(best_similarity, vetoed)
+
+    @staticmethod
+    def _keyword_vetoed(norm: NormalizedTrack, norm_candidate: NormalizedTrack) -> bool:
+        """
+        Whether compare_tracks would veto the candidate (a special keyword only in the candidate),
+        using only the keyword flags computed at normalization.
+        """
+        if not norm_candidate.has_keyword:
+            return False
+        if norm_candidate.title.has_keyword and not norm.title.has_keyword:
+            return True
+        if norm_candidate.album.has_keyword and not norm.album.has_keyword:
+            return True
+        return any(artist.has_keyword for artist in norm_candidate.artists) and any(
+            not artist.has_keyword for artist in norm.artists
+        )
+
+    def _weighted_score(
+        self, title: float, artist: float, album: float, duration: float, is_top_result: bool
+    ) -> float:
+        """Overall score of a candidate from its unweighted component similarities."""
+        title_similarity = title * 1.1  # title weight
+        artist_similarity = artist
+        album_similarity = album * 1.5  # album weight
+        duration_similarity = duration * 0.8  # duration weight
+
+        top_result_multiplier = self.top_result_multiplier if is_top_result else 1.0
+
+        # Calculate an overall similarity score including duration similarity as a factor
+        overall_similarity = (
+            title_similarity + artist_similarity + album_similarity + duration_similarity
+        ) / 4.0
+
+        overall_similarity *= top_result_multiplier
+        return overall_similarity
+
+    def compare_tracks(self, track: Track, candidate: Track) -> TrackComparison:
+        """
+        Compare a track with a candidate. The matcher keeps no state between comparisons,
+        so a single instance can be shared between threads.
+        """
+        norm = track.normalized(self._keywords)
+        norm_candidate = candidate.normalized(self._keywords)
+        title = self._similar_normalized(norm.title, norm_candidate.title)
+        artist = self._similar_normalized_artists(norm.artists, norm_candidate.artists)
+        album = self._similar_cached(norm.album, norm_candidate.album)
+        return TrackComparison(
+            title=title.score,
+            artist=artist.score,
+            album=album.score,
+            duration=self._similar_duration(track.duration, candidate.duration),
+            vetoed=title.vetoed or artist.vetoed or album.vetoed,
+        )
 
     def match_track_one_to_one(self, track1: Track, track2: Track) -> bool:
         """
@@ -174,19 +505,23 @@ class MusicMatcher:
         The similarity of strings should be above the tolerance, and the duration score
         should contribute to the overall match decision.
         """
-        title_similarity = self._similar_strings(track1.title, track2.title)
-        artist_similarity = self._similar_artists(track1.artists, track2.artists)
-        album_similarity = self._similar_strings(track1.album, track2.album)
-        duration_similarity = self._similar_duration(track1.duration, track2.duration)
-        if self._skip:
-            self._skip = False
+        if self.prefilter:
+            if self._similar_duration(track1.duration, track2.duration) == 0.0:
+                return False
+            if self._keyword_vetoed(
+                track1.normalized(self._keywords), track2.normalized(self._keywords)
+            ):
+                return False
+
+        comparison = self.compare_tracks(track1, track2)
+        if comparison.vetoed:
             return False
         # We can now also use the duration_similarity score (a float) in this logic
         return (
-            title_similarity >= self.tolerance
-            and artist_similarity >= self.tolerance
-            and album_similarity >= self.tolerance
-            and duration_similarity > 0.0  # Ensure some duration similarity
+            comparison.title >= self.tolerance
+            and comparison.artist >= self.tolerance
+            and comparison.album >= self.tolerance
+            and comparison.duration > 0.0  # Ensure some duration similarity
         )
 
     def match_tracks_one_to_many(self, track: Track, track_list: List[Track]) -> Optional[Track]:
@@ -194,40 +529,170 @@ class MusicMatcher:
         Find the best match for a given track from a list of tracks.
         Returns the most similar track or None if no match is found.
         """
+        best_match, best_score = self.best_candidate(track, track_list)
+        if best_match is None or best_score < self.tolerance:
+            return None
+        best_match.score = best_score
+        return best_match
+
+    def best_candidate(self, track: Track, track_list: List[Track]) -> Tuple[Optional[Track], float]:
+        """
+        Return the highest scoring candidate and its score, regardless of the tolerance.
+        Vetoed candidates are ignored. Returns (None, 0.0) if no candidate scores above 0.
+        On a tie, the first candidate of the list wins.
+        """
+        if self.prefilter:
+            return self._best_candidate_prefiltered(track, track_list)
+
         best_match = None
         best_score = 0.0
 
         for candidate in track_list:
-            title_similarity = (
-                self._similar_strings(track.title, candidate.title) * 1.1  # title weight
-            )
-            artist_similarity = self._similar_artists(track.artists, candidate.artists)
-            album_similarity = (
-                self._similar_strings(track.album, candidate.album) * 1.5  # album weight
-            )
-            duration_similarity = (
-                self._similar_duration(track.duration, candidate.duration) * 0.8  # duration weight
-            )
-            if self._skip:
-                self._skip = False
+            comparison = self.compare_tracks(track, candidate)
+            if comparison.vetoed:
                 continue
 
-            top_result_multiplier = self.top_result_multiplier if candidate.isTopResult else 1.0
+            overall_similarity = self._weighted_score(
+                comparison.title,
+                comparison.artist,
+                comparison.album,
+                comparison.duration,
+                candidate.isTopResult,
+            )
+
+            if overall_similarity > best_score:
+                best_score = overall_similarity
+                best_match = candidate
+        return best_match, best_score
 
-            # Calculate an overall similarity score including duration similarity as a factor
-            overall_similarity = (
-                title_similarity + artist_similarity + album_similarity + duration_similarity
-            ) / 4.0
+    def _best_candidate_prefiltered(
+        self, track: Track, track_list: List[Track]
+    ) -> Tuple[Optional[Track], float]:
+        """
+        best_candidate with a prefilter. Vetoed candidates are dropped using the keyword flags,
+        the others get an upper bound of their score from the exact duration similarity and
+        cheap bounds of the string similarities. Candidates are then fully scored from the
+        highest bound down, and the search stops once no remaining bound can beat the best score.
+        """
+        norm = track.normalized(self._keywords)
 
-            overall_similarity *= top_result_multiplier
+        bounded = []
+        for index, candidate in enumerate(track_list):
+            norm_candidate = candidate.normalized(self._keywords)
+            if self._keyword_vetoed(norm, norm_candidate):
+                continue
+            duration = self._similar_duration(track.duration, candidate.duration)
+            title_bound = _similarity_bound(norm.title, norm_candidate.title)
+            artist_bound = max(
+                (
+                    _similarity_bound(artist, artist_candidate)
+                    for artist in norm.artists
+                    for artist_candidate in norm_candidate.artists
+                ),
+                default=0.0,
+            )
+            album_bound = _similarity_bound(norm.album, norm_candidate.album)
+            bound = self._weighted_score(
+                title_bound, artist_bound, album_bound, duration, candidate.isTopResult
+            )
+            bounded.append(
+                (bound, index, candidate, norm_candidate, duration, title_bound, artist_bound)
+            )
+        bounded.sort(key=lambda item: (-item[0], item[1]))
 
-            if overall_similarity >= self.tolerance:
-                if overall_similarity > best_score:
-                    best_score = overall_similarity
-                    best_match = candidate
-        if best_match:
-            best_match.score = best_score
-        return best_match
+        best_match = None
+        best_score = 0.0
+        best_index = -1
+        for bound, index, candidate, norm_candidate, duration, title_bound, artist_bound in bounded:
+            if bound < best_score:
+                break  # bounds are sorted, no remaining candidate can win
+            top = candidate.isTopResult
+
+            # album has the highest weight, so it is compared first
+            album = self._similar_cached(norm.album, norm_candidate.album).score
+            if self._weighted_score(title_bound, artist_bound, album, duration, top) < best_score:
+                continue
+            title = self._similar_normalized(norm.title, norm_candidate.title).score
+            if self._weighted_score(title, artist_bound, album, duration, top) < best_score:
+                continue
+            artist = self._similar_normalized_artists(norm.artists, norm_candidate.artists).score
+
+            score = self._weighted_score(title, artist, album, duration, top)
+            if score > best_score or (
+                score == best_score and best_match is not None and index < best_index
+            ):
+                best_score = score
+                best_match = candidate
+                best_index = index
+        return best_match, best_score
+
+    def score_matrix(self, sources: List[Track], candidates: List[Track]) -> Dict[str, "np.ndarray"]:
+        """
+        Score N source tracks against M candidates in one call.
+        Returns N x M arrays per component ("title", "artist", "album", "duration", already weighted),
+        a boolean "vetoed" mask (keyword only in the candidate) and the weighted "total",
+        which equals the score match_tracks_one_to_many computes (0.0 for vetoed pairs).
+        """
+        if np is None:
+            raise ImportError("score_matrix requires numpy: pip install numpy")
+
+        shape = (len(sources), len(candidates))
+        title = np.zeros(shape)
+        artist = np.zeros(shape)
+        album = np.zeros(shape)
+        vetoed = np.zeros(shape, dtype=bool)
+
+        for i, source in enumerate(sources):
+            for j, candidate in enumerate(candidates):
+                comparison = self.compare_tracks(source, candidate)
+                title[i, j] = comparison.title
+                artist[i, j] = comparison.artist
+                album[i, j] = comparison.album
+                vetoed[i, j] = comparison.vetoed
+
+        title *= 1.1  # title weight
+        album *= 1.5  # album weight
+
+        # duration similarity, vectorized over all pairs
+        source_durations = np.array([track.duration for track in sources], dtype=float)
+        candidate_durations = np.array([track.duration for track in candidates], dtype=float)
+        difference = np.abs(source_durations[:, None] - candidate_durations[None, :])
+        duration = np.where(
+            difference > self.duration_threshold,
+            0.0,
+            1.0 - (difference / self.duration_threshold),
+        )
+        duration *= 0.8  # duration weight
+
+        multiplier = np.array(
+            [self.top_result_multiplier if c.isTopResult else 1.0 for c in candidates]
+        )
+        total = (title + artist + album + duration) / 4.0 * multiplier[None, :]
+        total[vetoed] = 0.0
+
+        return {
+            "title": title,
+            "artist": artist,
+            "album": album,
+            "duration": duration,
+            "vetoed": vetoed,
+            "total": total,
+        }
+
+    def best_from_matrix(self, scores: Dict[str, "np.ndarray"]) -> List[Optional[int]]:
+        """
+        Return, for each source row of a score_matrix result, the index of the best candidate
+        (same choice as match_tracks_one_to_many) or None if no candidate reaches the tolerance.
+        """
+        total = np.where(scores["vetoed"], -np.inf, scores["total"])
+        best = []
+        for row in total:
+            if row.size == 0:
+                best.append(None)
+                continue
+            j = int(np.argmax(row))
+            best.append(j if row[j] >= self.tolerance and row[j] > 0.0 else None)
+        return best
 
     def match_tracks_many_to_many(
         self, list1: List[Track], list2: List[Track]
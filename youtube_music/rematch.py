@@ -0,0 +1,155 @@
+# Re-run the matching offline against the search results stored in the search cache.
+# Useful to tune `tolerance`, `duration_threshold` or `top_result_multiplier` without calling
+# the YouTube Music API. Matching runs on all cores, and the new video IDs are compared
+# with the previous run recorded in data/journal.
+import datetime
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+from journal import MigrationJournal
+from match import MusicMatcher
+from search_cache import SearchCache
+from ytm_ops import TYMusicOp
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "qq_music"))
+from playlist_store import open_playlist, scan_playlists  # noqa: E402
+
+_matcher: Optional[MusicMatcher] = None  # one matcher per worker process
+
+
+def _init_worker(matcher_params: dict):
+    global _matcher
+    _matcher = MusicMatcher(**matcher_params)
+
+
+def _rematch_track(item: Tuple[dict, dict]) -> Tuple[Optional[str], Optional[float], Optional[str]]:
+    """
+    Match one track against its cached search results, using the same
+    detailed-then-simple strategy as TYMusicOp.search_songs.
+    Returns (video ID, score, query type), or (None, None, None) if nothing matched.
+    """
+    track, results = item
+    external_track = TYMusicOp._build_external_track(track, _matcher.keywords)
+    for query_type in ("detailed", "simple"):
+        yt_results = results.get(query_type)
+        if not yt_results:
+            continue
+        yt_tracks = TYMusicOp._extract_yt_tracks(yt_results, _matcher.keywords)
+        matched_track = _matcher.match_tracks_one_to_many(external_track, yt_tracks)
+        if matched_track:
+            return matched_track.id, matched_track.score, query_type
+    return None, None, None
+
+
+def load_cached_results(cache: SearchCache, tracks: List[dict], language: str) -> List[dict]:
+    """
+    Return the cached raw search results of each track per query type (None if not cached).
+    Queries are looked up in bulk and read-only, so the cache's LRU order is left untouched.
+    """
+    query_types = ("detailed", "simple")
+    queries = [
+        {query_type: TYMusicOp._build_query(track, query_type) for query_type in query_types}
+        for track in tracks
+    ]
+    cached = cache.get_many(
+        (query for track_queries in queries for query in track_queries.values()), language
+    )
+    return [
+        {query_type: cached[query] for query_type, query in track_queries.items()}
+        for track_queries in queries
+    ]
+
+
+def rematch_playlist(
+    executor: ProcessPoolExecutor, workers: int, tracks: List[dict], results: List[dict]
+) -> List[Tuple[Optional[str], Optional[float], Optional[str]]]:
+    """
+    Re-match all tracks of a playlist in the process pool. Results keep the order of tracks.
+    The executor must be created with `initializer=_init_worker`.
+    """
+    chunksize = max(1, len(tracks) // (workers * 4))
+    return list(executor.map(_rematch_track, zip(tracks, results), chunksize=chunksize))
+
+
+def diff_with_journal(journal: MigrationJournal, tracks: List[dict], matches: list) -> dict:
+    """
+    Compare the new matches with the previous run recorded in the journal.
+    """
+    diff = {"changed": [], "gained": [], "lost": [], "unchanged": 0, "not_in_journal": 0}
+    for index, (track, (video_id, score, _)) in enumerate(zip(tracks, matches)):
+        previous = journal.get(index, track)
+        if previous is None:
+            diff["not_in_journal"] += 1
+            continue
+        previous_id = previous["videoId"]
+        if previous_id == video_id:
+            diff["unchanged"] += 1
+            continue
+        entry = {"index": index, "name": track["name"], "previous": previous_id, "new": video_id}
+        if previous_id is None:
+            diff["gained"].append(entry)
+        elif video_id is None:
+            diff["lost"].append(entry)
+        else:
+            diff["changed"].append(entry)
+    return diff
+
+
+if __name__ == "__main__":
+    files = scan_playlists("data/qqmusic-raw")
+    language = "en"  # must be the language used when the results were cached
+    workers = os.cpu_count() or 1
+
+    # >> Parameters to evaluate
+    matcher_params = {
+        "tolerance": 0.3,
+        "duration_threshold": 3,
+        "top_result_multiplier": 1.2,
+    }
+
+    # ttl=None: use every cached result regardless of its age
+    cache = SearchCache("data/cache/ytmusic-search.sqlite3", ttl=None)
+    output_dir = "data/rematch"
+    os.makedirs(output_dir, exist_ok=True)
+
+    executor = ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(matcher_params,)
+    )
+    for file in files:
+        playlist = open_playlist(file)
+        playlist_name = playlist.name
+        tracks: List[dict] = list(playlist.songs)
+
+        results = load_cached_results(cache, tracks, language)
+        uncached = sum(1 for r in results if r["detailed"] is None)
+        matches = rematch_playlist(executor, workers, tracks, results)
+
+        journal = MigrationJournal(playlist_name, "data/journal", resume=True)
+        diff = diff_with_journal(journal, tracks, matches)
+
+        data = {
+            "name": playlist_name,
+            "date": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "params": matcher_params,
+            "songs": [
+                {"name": track["name"], "videoId": video_id, "score": score, "query_type": query_type}
+                for track, (video_id, score, query_type) in zip(tracks, matches)
+            ],
+            "diff": diff,
+        }
+        output_path = os.path.join(output_dir, f"{MigrationJournal._safe_name(playlist_name)}.json")
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(data, indent=4, ensure_ascii=False))
+
+        matched = sum(1 for video_id, _, _ in matches if video_id)
+        print(
+            f"{playlist_name}: {matched}/{len(tracks)} matched ({uncached} not cached), "
+            f"{len(diff['changed'])} changed, {len(diff['gained'])} gained, "
+            f"{len(diff['lost'])} lost since the last run."
+        )
+
+    executor.shutdown()
+    cache.close()
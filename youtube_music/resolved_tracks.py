@@ -0,0 +1,144 @@
+# Persistent store of resolved tracks, shared by all playlists and runs.
+# A song is identified by its normalized title, artists and duration bucket, and resolves
+# to the video ID and score chosen by the matcher. Entries are tied to the matcher settings
+# they were resolved with, and are ignored (then replaced) once the settings change.
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional, Tuple
+
+from match import Track
+
+
+class ResolvedTrackStore:
+    def __init__(
+        self,
+        path: str = "data/cache/resolved-tracks.sqlite3",
+        duration_bucket: int = 5,
+    ):
+        """
+        :param path: Path of the SQLite database file. Use ":memory:" for a non-persistent store.
+        :param duration_bucket: Width (in seconds) of the duration buckets. Songs with the same
+                                title and artists are the same song if their durations fall
+                                in the same bucket.
+        """
+        self.path = path
+        self.duration_bucket = duration_bucket
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0  # entries resolved with other matcher settings
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if path != ":memory:" and directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS resolved_tracks (
+                identity TEXT PRIMARY KEY,
+                video_id TEXT NOT NULL,
+                title TEXT NOT NULL,
+                score REAL NOT NULL,
+                query_type TEXT NOT NULL,
+                params_key TEXT NOT NULL,
+                params TEXT NOT NULL,
+                resolved_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def params_key(params: dict) -> str:
+        """Short hash of the matcher settings an entry was resolved with."""
+        encoded = json.dumps(params, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        return hashlib.sha1(encoded).hexdigest()[:16]
+
+    def identity(self, track: Track, keywords: Tuple[str, ...]) -> str:
+        """
+        Canonical identity of a track: normalized title, sorted normalized artists and
+        duration bucket. Album is ignored, the same song is often on several albums.
+        """
+        norm = track.normalized(keywords)
+        title = " ".join(norm.title.parts)
+        artists = "\x1f".join(sorted(" ".join(artist.parts) for artist in norm.artists))
+        return f"{title}\x1e{artists}\x1e{track.duration // self.duration_bucket}"
+
+    def get(self, identity: str, params_key: str) -> Optional[dict]:
+        """
+        Return the resolution of a track ({videoId, title, score, query_type}), or None if the
+        track is unknown or was resolved with other matcher settings.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT video_id, title, score, query_type, params_key FROM resolved_tracks "
+                "WHERE identity = ?",
+                (identity,),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            if row[4] != params_key:
+                self.stale += 1
+                self.misses += 1
+                return None
+            self.hits += 1
+        return {"videoId": row[0], "title": row[1], "score": row[2], "query_type": row[3]}
+
+    def set(
+        self,
+        identity: str,
+        video_id: str,
+        title: str,
+        score: float,
+        query_type: str,
+        params: dict,
+    ):
+        """Store the resolution of a track, replacing any previous one."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO resolved_tracks VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    identity,
+                    video_id,
+                    title,
+                    score,
+                    query_type,
+                    self.params_key(params),
+                    json.dumps(params, sort_keys=True, ensure_ascii=False),
+                    time.time(),
+                ),
+            )
+            self._conn.commit()
+
+    def invalidate(self, keep_params_key: Optional[str] = None):
+        """
+        Remove resolved tracks. Without arguments the whole store is cleared, otherwise
+        only the entries resolved with other matcher settings than keep_params_key.
+        """
+        with self._lock:
+            if keep_params_key is None:
+                self._conn.execute("DELETE FROM resolved_tracks")
+            else:
+                self._conn.execute(
+                    "DELETE FROM resolved_tracks WHERE params_key != ?", (keep_params_key,)
+                )
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        """Return hit/miss counters for this run."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,200 @@
+# Persistent on-disk cache for YouTube Music search results.
+# Results are stored in a local SQLite database keyed by (normalized query, language),
+# so re-runs and overlapping playlists don't hit the network for queries already seen.
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+
+class SearchCache:
+    def __init__(
+        self,
+        path: str = "data/cache/ytmusic-search.sqlite3",
+        ttl: Optional[float] = 30 * 24 * 3600,
+        max_entries: Optional[int] = 100000,
+        bypass: bool = False,
+    ):
+        """
+        :param path: Path of the SQLite database file. Use ":memory:" for a non-persistent cache.
+        :param ttl: Time (in seconds) an entry stays valid. None = never expires.
+        :param max_entries: Maximum number of entries kept. Least recently used entries are evicted first. None = unbounded.
+                            Once over the limit, entries are evicted in one batch down to 90% of it.
+        :param bypass: If True, never read from the cache but still store fresh results (forces a refresh).
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.bypass = bypass
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if path != ":memory:" and directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS search_results (
+                query TEXT NOT NULL,
+                language TEXT NOT NULL,
+                results TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (query, language)
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_accessed_at ON search_results (accessed_at)"
+        )
+        self._conn.commit()
+        self._count = self._row_count()  # upper bound, replaced entries are counted twice
+
+    def _row_count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM search_results").fetchone()[0]
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """Normalize a query so trivial differences (case, whitespace) share one entry."""
+        return re.sub(r"\s+", " ", query.strip().lower())
+
+    def get(self, query: str, language: str) -> Optional[List[dict]]:
+        """
+        Return cached search results, or None if the query is not cached (or expired).
+        """
+        if self.bypass:
+            self.misses += 1
+            return None
+
+        key = self.normalize_query(query)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT results, created_at FROM search_results WHERE query = ? AND language = ?",
+                (key, language),
+            ).fetchone()
+            if row is None or (self.ttl is not None and now - row[1] > self.ttl):
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE search_results SET accessed_at = ? WHERE query = ? AND language = ?",
+                (now, key, language),
+            )
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def get_many(
+        self, queries: Iterable[str], language: str, batch_size: int = 500
+    ) -> Dict[str, Optional[List[dict]]]:
+        """
+        Read-only bulk lookup: return the cached results of each query (None if not cached
+        or expired). Unlike get(), entries are not marked as used, so the LRU order is kept.
+        """
+        keys = {query: self.normalize_query(query) for query in queries}
+        if self.bypass:
+            self.misses += len(keys)
+            return {query: None for query in keys}
+
+        unique_keys = list(set(keys.values()))
+        found: Dict[str, str] = {}
+        now = time.time()
+        with self._lock:
+            for start in range(0, len(unique_keys), batch_size):
+                batch = unique_keys[start : start + batch_size]
+                rows = self._conn.execute(
+                    "SELECT query, results, created_at FROM search_results "
+                    f"WHERE language = ? AND query IN ({', '.join('?' * len(batch))})",
+                    [language, *batch],
+                )
+                for key, results, created_at in rows:
+                    if self.ttl is None or now - created_at <= self.ttl:
+                        found[key] = results
+
+        cached = {}
+        for query, key in keys.items():
+            results = found.get(key)
+            if results is None:
+                self.misses += 1
+                cached[query] = None
+            else:
+                self.hits += 1
+                cached[query] = json.loads(results)
+        return cached
+
+    def set(self, query: str, language: str, results: List[dict]):
+        """
+        Store search results for a query, evicting the least recently used entries if needed.
+        """
+        key = self.normalize_query(query)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search_results VALUES (?, ?, ?, ?, ?)",
+                (key, language, json.dumps(results, ensure_ascii=False), now, now),
+            )
+            self._count += 1
+            if self.max_entries is not None and self._count > self.max_entries:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Evict the least recently used entries down to 90% of max_entries (lock held)."""
+        self._count = self._row_count()
+        if self._count <= self.max_entries:
+            return
+        self._conn.execute(
+            """
+            DELETE FROM search_results WHERE rowid IN (
+                SELECT rowid FROM search_results ORDER BY accessed_at ASC LIMIT ?
+            )
+            """,
+            (self._count - int(self.max_entries * 0.9),),
+        )
+        self._count = self._row_count()
+
+    def invalidate(self, query: Optional[str] = None, language: Optional[str] = None):
+        """
+        Remove cached entries. Without arguments the whole cache is cleared.
+        """
+        clauses, params = [], []
+        if query is not None:
+            clauses.append("query = ?")
+            params.append(self.normalize_query(query))
+        if language is not None:
+            clauses.append("language = ?")
+            params.append(language)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            self._conn.execute(f"DELETE FROM search_results{where}", params)
+            self._conn.commit()
+            self._count = self._row_count()
+
+    def purge_expired(self):
+        """Remove all entries older than the TTL."""
+        if self.ttl is None:
+            return
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM search_results WHERE created_at < ?", (time.time() - self.ttl,)
+            )
+            self._conn.commit()
+            self._count = self._row_count()
+
+    def stats(self) -> dict:
+        """Return hit/miss counters for this run."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
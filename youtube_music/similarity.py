@@ -0,0 +1,63 @@
+# Pluggable string similarity engines used by MusicMatcher.
+# - "difflib": difflib.SequenceMatcher ratio, reproduces the original scores exactly.
+# - "indel": normalized Indel similarity from rapidfuzz (C++), much faster. Scores are close
+#   to difflib's but not identical, since difflib doesn't compute the true longest common subsequence.
+# - "auto": "indel" when rapidfuzz is installed, otherwise "difflib".
+import difflib
+
+try:
+    from rapidfuzz.distance import Indel
+except ImportError:  # rapidfuzz is optional
+    Indel = None
+
+
+class DifflibEngine:
+    name = "difflib"
+
+    def ratio(self, s1: str, s2: str) -> float:
+        return difflib.SequenceMatcher(None, s1, s2).ratio()
+
+    def ratio_above(self, s1: str, s2: str, cutoff: float) -> float:
+        """
+        Return the ratio if it can exceed cutoff, otherwise 0.0.
+        Uses the cheap upper bounds (length bound, then character multiset bound)
+        to skip the full comparison, so the best ratio of a set of pairs is unchanged.
+        """
+        length = len(s1) + len(s2)
+        if not length:
+            return 1.0 if cutoff < 1.0 else 0.0
+        if 2.0 * min(len(s1), len(s2)) / length <= cutoff:
+            return 0.0
+        matcher = difflib.SequenceMatcher(None, s1, s2)
+        if matcher.quick_ratio() <= cutoff:
+            return 0.0
+        return matcher.ratio()
+
+
+class IndelEngine:
+    name = "indel"
+
+    def __init__(self):
+        if Indel is None:
+            raise ImportError("The 'indel' similarity engine requires rapidfuzz: pip install rapidfuzz")
+
+    def ratio(self, s1: str, s2: str) -> float:
+        return Indel.normalized_similarity(s1, s2)
+
+    def ratio_above(self, s1: str, s2: str, cutoff: float) -> float:
+        """Return the ratio if it exceeds cutoff, otherwise 0.0."""
+        ratio = Indel.normalized_similarity(s1, s2, score_cutoff=cutoff)
+        return ratio if ratio > cutoff else 0.0
+
+
+def get_engine(name: str = "auto"):
+    """
+    Return a similarity engine by name: "auto", "difflib" or "indel".
+    """
+    if name == "auto":
+        name = "indel" if Indel is not None else "difflib"
+    if name == "difflib":
+        return DifflibEngine()
+    if name == "indel":
+        return IndelEngine()
+    raise ValueError(f"Unknown similarity engine: {name}")
@@ -0,0 +1,105 @@
+import json
+import statistics
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+
+class Metrics:
+    """
+    Thread-safe timers, counters and histograms collected during a migration run.
+    """
+
+    def __init__(self):
+        self._counters: Dict[str, int] = {}
+        self._histograms: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def count(self, name: str, value: int = 1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float):
+        """Record a value (e.g. a duration in seconds) in a histogram."""
+        with self._lock:
+            self._histograms.setdefault(name, []).append(value)
+
+    @contextmanager
+    def timer(self, name: str):
+        """Time a block of code and record its duration (in seconds) in the `name` histogram."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def counter(self, name: str) -> int:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def summary(self) -> dict:
+        """
+        Return a machine-readable summary: counters, and per histogram the number of samples,
+        total, mean and p50/p90/p99/max.
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {name: list(values) for name, values in self._histograms.items()}
+
+        timers = {}
+        for name, values in histograms.items():
+            if len(values) > 1:
+                q = statistics.quantiles(values, n=100, method="inclusive")
+                p50, p90, p99 = q[49], q[89], q[98]
+            else:
+                p50 = p90 = p99 = values[0]
+            timers[name] = {
+                "count": len(values),
+                "total": sum(values),
+                "mean": sum(values) / len(values),
+                "p50": p50,
+                "p90": p90,
+                "p99": p99,
+                "max": max(values),
+            }
+        return {
+            "elapsed": time.time() - self.started_at,
+            "counters": counters,
+            "timers": timers,
+        }
+
+    def to_json(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(self.summary(), indent=4, ensure_ascii=False))
+
+
+class ProgressReporter:
+    """
+    Print a progress line (tracks/s and ETA) at most every `interval` seconds.
+    """
+
+    def __init__(self, total: Optional[int], interval: float = 10.0, label: str = "Progress"):
+        self.total = total
+        self.interval = interval
+        self.label = label
+        self.done = 0
+        self._start = time.perf_counter()
+        self._last_report = self._start
+
+    def update(self, n: int = 1):
+        self.done += n
+        now = time.perf_counter()
+        if now - self._last_report >= self.interval:
+            self._last_report = now
+            print(self.line(now))
+
+    def line(self, now: Optional[float] = None) -> str:
+        elapsed = (now or time.perf_counter()) - self._start
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        if self.total is None:
+            return f"[{self.label}] {self.done} tracks, {rate:.1f} tracks/s"
+        remaining = self.total - self.done
+        eta = f"{remaining / rate:.0f}s" if rate > 0 else "?"
+        return f"[{self.label}] {self.done}/{self.total} tracks, {rate:.1f} tracks/s, ETA {eta}"
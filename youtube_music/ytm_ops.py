@@ -4,17 +4,138 @@
 import datetime
 import json
 import re
-from collections import OrderedDict
-from typing import List, Optional
-
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from catalog import TrackCatalog
+from journal import MigrationJournal
+from library_index import PlaylistIndex
 from match import MusicMatcher, Track
+from resolved_tracks import ResolvedTrackStore
+from search_cache import SearchCache
+from utils.metrics import Metrics, ProgressReporter
+from utils.rate_limit import RateLimiter
 from utils.terminal_col import Color, TermCol
 from ytmusicapi import YTMusic
 
 
+QUERY_STATS = (
+    "api_calls",  # searches sent to YouTube Music
+    "deduplicated",  # identical queries already searched (or in flight) during this run
+    "cache_hits",  # queries served by the persistent search cache
+    "fallback_skipped",  # simple queries skipped, detailed results scored too low
+    "fallback_same_query",  # simple queries skipped, identical to the detailed query
+    "resolved",  # tracks resolved by the resolved-track store, without searching
+    "catalog_hits",  # tracks matched in the local catalog of past search results
+)
+
+
+class BulkResult(NamedTuple):
+    """
+    Outcome of a bulk operation. Pass the keys of `failed` to the same method to retry them.
+    """
+
+    succeeded: Dict[str, object]  # item -> result (playlist ID, number of songs removed, ...)
+    failed: Dict[str, str]  # item -> error message
+    planned: List[str]  # dry run: the mutations that would have been made
+
+
+def _ordered_map(func, items: Iterable, workers: int) -> Iterator[tuple]:
+    """
+    Yield (item, func(item)) in input order, running up to `workers` calls concurrently.
+    Items are consumed lazily with a bounded number in flight.
+    """
+    if workers <= 1:
+        for item in items:
+            yield item, func(item)
+        return
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+    in_flight = deque()
+    try:
+        for item in items:
+            in_flight.append((item, executor.submit(func, item)))
+            if len(in_flight) >= workers * 2:
+                item, future = in_flight.popleft()
+                yield item, future.result()
+        while in_flight:
+            item, future = in_flight.popleft()
+            yield item, future.result()
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
 class TYMusicOp:
-    def __init__(self, oauth_path: str, language: str = "en"):
+    def __init__(
+        self,
+        oauth_path: str,
+        language: str = "en",
+        cache: Optional[SearchCache] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        max_retries: int = 5,
+        library_path: Optional[str] = None,
+        library_ttl: Optional[float] = 3600,
+        skip_fallback_below: Optional[float] = None,
+        metrics: Optional[Metrics] = None,
+        progress_interval: Optional[float] = None,
+        resolved: Optional[ResolvedTrackStore] = None,
+        catalog: Optional[TrackCatalog] = None,
+        catalog_min_score: float = 0.6,
+        run_cache_size: int = 1000,
+        similarity: str = "auto",
+    ):
+        """
+        :param oauth_path: Path to the ytmusicapi oauth file.
+        :param language: Language of the YouTube Music responses.
+        :param cache: Optional persistent search cache. None = always query the API.
+        :param rate_limiter: Optional rate limiter shared by all API searches.
+        :param max_retries: Number of retries (with exponential backoff) when the API throttles a search.
+        :param library_path: Optional JSON file to persist the library playlist index between runs.
+        :param library_ttl: Time (in seconds) before the library playlist index is downloaded again.
+        :param skip_fallback_below: Skip the simple (fallback) query when the best candidate of the
+                                    detailed query scores below this value. None = always fall back.
+        :param metrics: Collects timers and counters of the API calls and matching stages.
+        :param progress_interval: Print a progress line (tracks/s, ETA) every this many seconds.
+        :param resolved: Optional persistent store of resolved tracks. Songs already matched
+                         (in any playlist or run, with the same matcher settings) are not searched again.
+        :param catalog: Optional local catalog of past search results. Tracks are matched against
+                        it first, and only searched when no catalog track scores catalog_min_score.
+        :param catalog_min_score: Minimum score of a catalog match. Catalog candidates were not
+                                  searched for this track, so this is stricter than the tolerance.
+        :param run_cache_size: Number of recent search results kept in memory during the run
+                               (least recently used first out). Older ones come from the cache.
+        :param similarity: String similarity engine of the matcher (see MusicMatcher).
+                           "difflib" reproduces the scores of earlier versions.
+        """
         self.api = YTMusic(oauth_path, language=language)
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.progress_interval = progress_interval
+        self.language = language
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        self.library = PlaylistIndex(
+            self.api, path=library_path, ttl=library_ttl, metrics=self.metrics
+        )
+        self._matchers: Dict[float, MusicMatcher] = {}
+        self.skip_fallback_below = skip_fallback_below
+        self.resolved = resolved
+        self.catalog = catalog
+        self.catalog_min_score = catalog_min_score
+        # recent queries of this run -> their results (a future while the search is in flight),
+        # shared across playlists and workers
+        self.run_cache_size = run_cache_size
+        self.similarity = similarity
+        self._run_results: "OrderedDict[str, Future]" = OrderedDict()
+        self._run_lock = threading.Lock()
+
+    @property
+    def query_stats(self) -> Dict[str, int]:
+        """API searches made and saved per strategy during this run."""
+        return {key: self.metrics.counter(f"search.{key}") for key in QUERY_STATS}
 
     def create_playlist(
         self,
@@ -26,122 +147,498 @@ class TYMusicOp:
         """
         Create a YouTube Music playlist.
         """
-        return self.api.create_playlist(name, description, privacy, video_ids=tracks)
+        with self.metrics.timer("api.create_playlist"):
+            playlist_id = self.api.create_playlist(name, description, privacy, video_ids=tracks)
+        self.library.add(name, playlist_id)
+        return playlist_id
 
     def search_songs(
-        self, external_tracks: List[dict], tolerance: float, playlist_name: str
+        self,
+        external_tracks: List[dict],
+        tolerance: float,
+        playlist_name: str,
+        workers: int = 1,
+        journal: Optional[MigrationJournal] = None,
     ) -> List[str]:
         """
         Search YouTube Music for external tracks and return their video IDs.
-        First, perform a simple query (track title only). If no match is found,
-        perform a detailed query (track title and artist names).
+        First, perform a detailed query (track title and artist names). If no match is found,
+        perform a simple query (track title only).
+        With workers > 1 the searches run concurrently; results keep the order of external_tracks.
+        Every result is recorded in the journal; tracks already in the journal are not searched again.
         """
-        video_ids = []
-        not_found_tracks = []
-        total_tracks = len(external_tracks)
+        return list(
+            self.iter_search_songs(external_tracks, tolerance, playlist_name, workers, journal)
+        )
 
-        print("Searching YouTube...")
+    def iter_search_songs(
+        self,
+        external_tracks: Iterable[dict],
+        tolerance: float,
+        playlist_name: str,
+        workers: int = 1,
+        journal: Optional[MigrationJournal] = None,
+        total_tracks: Optional[int] = None,
+    ) -> Iterator[str]:
+        """
+        Same as search_songs, but consumes external_tracks lazily and yields each video ID
+        as soon as its track is matched (in track order). At most a few tracks per worker
+        are in flight, so memory stays flat for arbitrarily long playlists.
+        """
+        if journal is None:
+            journal = MigrationJournal(playlist_name, directory=None)
+        if total_tracks is None and hasattr(external_tracks, "__len__"):
+            total_tracks = len(external_tracks)
+        total = total_tracks if total_tracks is not None else "?"
+
+        def match(item):
+            index, track = item
+            if journal.get(index, track) is not None:
+                return None  # already processed in a previous run
+            return self._match_track(track, tolerance)
 
-        for index, track in enumerate(external_tracks):
-            external_track = self._build_external_track(track)
-            matched_track = None
+        print("Searching YouTube...")
 
-            # Try simple query first
-            query = self._build_query(track, query_type="detailed")
-            yt_results = self.api.search(query)
+        progress = None
+        if self.progress_interval:
+            progress = ProgressReporter(total_tracks, self.progress_interval, playlist_name)
+
+        resumed = 0
+        for (index, track), result in _ordered_map(match, enumerate(external_tracks), workers):
+            if progress is not None:
+                progress.update()
+            if result is None:
+                resumed += 1
+                entry = journal.get(index, track)
+                if entry["videoId"]:
+                    yield entry["videoId"]
+                continue
 
-            # # Save results for debugging
-            # with open(f"yt_results_{track['name']}_detail.json", "w", encoding="utf-8") as f:
-            #     f.write(json.dumps(yt_results, indent=4, ensure_ascii=False))
+            external_track, matched_track, query_type, query = result
+            if matched_track:
+                label = {"detailed": "detail query", "simple": "simple query"}.get(
+                    query_type, query_type
+                )
+                print(
+                    f"[{index+1}/{total}] Matched ({label}): {external_track.title} -> {matched_track.title} (ytid: {matched_track.id}) (score: {matched_track.score})"
+                )
+                journal.record(index, track, query, matched_track.id, matched_track.score)
+                self.metrics.count("tracks.matched")
+                yield matched_track.id
+                continue
 
-            if yt_results:
-                yt_tracks = self._extract_yt_tracks(yt_results)
-                matched_track = self._find_best_match(external_track, yt_tracks, tolerance)
-                if matched_track:
-                    print(
-                        f"[{index+1}/{total_tracks}] Matched (detail query): {external_track.title} -> {matched_track.title} (ytid: {matched_track.id}) (score: {matched_track.score})"
-                    )
-                    video_ids.append(matched_track.id)
-                    continue  # Proceed to the next track
-
-            # If no match with detail query, try simple query
-            query = self._build_query(track, query_type="simple")
-            yt_results = self.api.search(query)
-
-            # # Save results for debugging
-            # with open(f"yt_results_{track['name']}_simple.json", "w", encoding="utf-8") as f:
-            #     f.write(json.dumps(yt_results, indent=4, ensure_ascii=False))
-
-            if yt_results:
-                yt_tracks = self._extract_yt_tracks(yt_results)
-                matched_track = self._find_best_match(external_track, yt_tracks, tolerance)
-                if matched_track:
-                    print(
-                        f"[{index+1}/{total_tracks}] Matched (simple query): {external_track.title} -> {matched_track.title} (ytid: {matched_track.id}) (score: {matched_track.score})"
-                    )
-                    video_ids.append(matched_track.id)
-                    continue  # Proceed to the next track
-
-            # If still no match found
             TermCol.print(
-                f"[{index+1}/{total_tracks}] Failed: {external_track.title}",
+                f"[{index+1}/{total}] Failed: {external_track.title}",
                 Color.YELLOW,
             )
-            track["query"] = query
-            track["end_reason"] = "No match found after detail and simple queries"
-            not_found_tracks.append(track)
+            journal.record(
+                index,
+                track,
+                query,
+                end_reason="No match found after detail and simple queries",
+            )
+            self.metrics.count("tracks.not_found")
 
-        self._handle_not_found_tracks(not_found_tracks, playlist_name)
+        if resumed:
+            self.metrics.count("tracks.resumed", resumed)
+            print(f"Resumed: {resumed} tracks were already processed.")
+        self._handle_not_found_tracks(journal.not_found_tracks(), playlist_name)
 
-        return video_ids
+    def _match_track(
+        self, track: dict, tolerance: float
+    ) -> Tuple[Track, Optional[Track], Optional[str], str]:
+        """
+        Search and match a single external track.
+        Returns (external track, matched track or None, query type that matched, last query).
+        The query type is "resolved" when the track comes from the resolved-track store,
+        and "catalog" when it was matched in the local catalog.
+        """
+        matcher = self._get_matcher(tolerance)
+        external_track = self._build_external_track(track, matcher.keywords)
+
+        if self.resolved is not None:
+            params = self._resolution_params(matcher)
+            identity = self.resolved.identity(external_track, matcher.keywords)
+            resolution = self.resolved.get(identity, ResolvedTrackStore.params_key(params))
+            if resolution is not None:
+                self._count("resolved")
+                matched_track = Track(
+                    title=resolution["title"],
+                    artists=[],
+                    album="",
+                    duration=0,
+                    id=resolution["videoId"],
+                    isYT=True,
+                )
+                matched_track.score = resolution["score"]
+                query = self._build_query(track, "detailed")
+                return external_track, matched_track, "resolved", query
+
+        result = None
+        if self.catalog is not None:
+            result = self._match_catalog(track, external_track, matcher)
+        if result is None:
+            result = self._search_and_match(track, external_track, matcher, tolerance)
+
+        _, matched_track, query_type, _ = result
+        if self.resolved is not None and matched_track:
+            self.resolved.set(
+                identity,
+                matched_track.id,
+                matched_track.title,
+                matched_track.score,
+                query_type,
+                params,
+            )
+        return result
 
-    def add_playlist_items(self, playlist_id: str, video_ids: List[str]):
+    def _match_catalog(
+        self, track: dict, external_track: Track, matcher: MusicMatcher
+    ) -> Optional[Tuple[Track, Optional[Track], Optional[str], str]]:
+        """
+        Match a track against the local catalog. Returns None on a catalog miss.
+        """
+        with self.metrics.timer("catalog.lookup"):
+            candidates = self.catalog.candidates(
+                external_track, matcher.keywords, max_duration_difference=matcher.duration_threshold
+            )
+            matched_track, score = matcher.best_candidate(external_track, candidates)
+        if matched_track is None or score < max(self.catalog_min_score, matcher.tolerance):
+            return None
+        self._count("catalog_hits")
+        matched_track.score = score
+        return external_track, matched_track, "catalog", self._build_query(track, "detailed")
+
+    def _resolution_params(self, matcher: MusicMatcher) -> dict:
+        """
+        Settings a resolved track depends on: the matcher's, the fallback strategy,
+        and whether (and how strictly) tracks are matched in the catalog.
+        """
+        return dict(
+            matcher.params,
+            skip_fallback_below=self.skip_fallback_below,
+            catalog=self.catalog is not None,
+            catalog_min_score=self.catalog_min_score if self.catalog is not None else None,
+        )
+
+    def _search_and_match(
+        self, track: dict, external_track: Track, matcher: MusicMatcher, tolerance: float
+    ) -> Tuple[Track, Optional[Track], Optional[str], str]:
+        """
+        Search YouTube Music with the detailed query, then the simple query, and match the results.
+        """
+        query = self._build_query(track, query_type="detailed")
+        yt_results = self._search(query)
+
+        # # Save results for debugging
+        # with open(f"yt_results_{track['name']}_detailed.json", "w", encoding="utf-8") as f:
+        #     f.write(json.dumps(yt_results, indent=4, ensure_ascii=False))
+
+        if yt_results:
+            with self.metrics.timer("extract_yt_tracks"):
+                yt_tracks = self._extract_yt_tracks(yt_results, matcher.keywords)
+            if self.catalog is not None:
+                self.catalog.add(yt_tracks)
+            with self.metrics.timer("matcher.score"):
+                matched_track, score = matcher.best_candidate(external_track, yt_tracks)
+            if matched_track and score >= tolerance:
+                matched_track.score = score
+                return external_track, matched_track, "detailed", query
+            if self.skip_fallback_below is not None and score < self.skip_fallback_below:
+                self._count("fallback_skipped")
+                return external_track, None, None, query
+
+        simple_query = self._build_query(track, query_type="simple")
+        if SearchCache.normalize_query(simple_query) == SearchCache.normalize_query(query):
+            # same results as the detailed query, which didn't match
+            self._count("fallback_same_query")
+            return external_track, None, None, query
+
+        query = simple_query
+        yt_results = self._search(query)
+        if yt_results:
+            with self.metrics.timer("extract_yt_tracks"):
+                yt_tracks = self._extract_yt_tracks(yt_results, matcher.keywords)
+            if self.catalog is not None:
+                self.catalog.add(yt_tracks)
+            with self.metrics.timer("matcher.score"):
+                matched_track = self._find_best_match(external_track, yt_tracks, tolerance)
+            if matched_track:
+                return external_track, matched_track, "simple", query
+
+        return external_track, None, None, query
+
+    def add_playlist_items(
+        self,
+        playlist_id: str,
+        video_ids: List[str],
+        chunk_size: int = 100,
+        existing_video_ids: Optional[set] = None,
+    ) -> List[str]:
         """
         Add songs to an existing YouTube Music playlist.
+        Songs already in the playlist are skipped, the rest is added in chunks of chunk_size,
+        each chunk retried on failure. Returns the video IDs that could not be added.
+        Pass existing_video_ids (updated in place) when adding in several batches,
+        so the playlist contents are only downloaded once.
         """
         unique_video_ids = list(OrderedDict.fromkeys(video_ids))
-        self.api.add_playlist_items(playlist_id, unique_video_ids)
-        print(f"{len(unique_video_ids)} songs added to playlist.")
+        if existing_video_ids is None:
+            existing_video_ids = set(self.get_playlist_video_ids(playlist_id))
+        missing_video_ids = [vid for vid in unique_video_ids if vid not in existing_video_ids]
+
+        if not missing_video_ids:
+            print("Playlist already up to date. No songs added.")
+            return []
+
+        added = 0
+        failed_video_ids = []
+        for start in range(0, len(missing_video_ids), chunk_size):
+            chunk = missing_video_ids[start : start + chunk_size]
+            try:
+                self._call_with_backoff(
+                    self._add_chunk,
+                    playlist_id,
+                    chunk,
+                    retry_any_error=True,
+                    metric="api.add_playlist_items",
+                )
+                added += len(chunk)
+                existing_video_ids.update(chunk)
+            except Exception as e:
+                TermCol.print(f"Failed to add {len(chunk)} songs: {e}", Color.YELLOW)
+                failed_video_ids.extend(chunk)
+
+        print(
+            f"{added} songs added to playlist "
+            f"({len(unique_video_ids) - len(missing_video_ids)} already present)."
+        )
+        return failed_video_ids
+
+    def _add_chunk(self, playlist_id: str, video_ids: List[str]):
+        response = self.api.add_playlist_items(playlist_id, video_ids)
+        if isinstance(response, dict) and response.get("status") not in (None, "STATUS_SUCCEEDED"):
+            raise Exception(f"add_playlist_items returned status {response.get('status')}")
+        return response
+
+    def get_playlist_video_ids(self, playlist_id: str) -> List[str]:
+        """
+        Retrieve the video IDs currently in a playlist.
+        """
+        playlist = self._call_with_backoff(
+            self.api.get_playlist, playlist_id, None, metric="api.get_playlist"
+        )
+        return [track["videoId"] for track in playlist.get("tracks", []) if track.get("videoId")]
 
     def get_playlist_id(self, name: str) -> str:
         """
         Retrieve the playlist ID by name.
         """
-        playlists = self.api.get_library_playlists(10000)
-        for playlist in playlists:
-            if name in playlist["title"]:
-                return playlist["playlistId"]
-        raise ValueError(f"Playlist '{name}' not found.")
+        playlist_id = self.library.find(name)
+        if playlist_id is None:
+            raise ValueError(f"Playlist '{name}' not found.")
+        return playlist_id
+
+    def find_playlist(self, name: str) -> Tuple[str, List[str]]:
+        """
+        Return the ID and video IDs of the playlist titled `name`. If the indexed playlist
+        no longer exists (deleted since the library index was saved), the library is
+        downloaded again once. Raises ValueError if the playlist is not found.
+        """
+        playlist_id = self.get_playlist_id(name)
+        try:
+            return playlist_id, self.get_playlist_video_ids(playlist_id)
+        except Exception as e:
+            TermCol.print(f"Playlist '{name}' ({playlist_id}) not found: {e}", Color.YELLOW)
+        self.library.refresh(force=True)
+        playlist_id = self.get_playlist_id(name)
+        return playlist_id, self.get_playlist_video_ids(playlist_id)
+
+    def remove_songs(self, playlist_id: str) -> int:
+        """
+        Remove all songs from a given playlist. Returns the number of songs removed.
+        """
+        playlist_items = self._call_with_backoff(
+            self.api.get_playlist, playlist_id, 10000, metric="api.get_playlist"
+        )
+        tracks = playlist_items.get("tracks") or []
+        if tracks:
+            self._call_with_backoff(
+                self.api.remove_playlist_items,
+                playlist_id,
+                tracks,
+                metric="api.remove_playlist_items",
+            )
+        return len(tracks)
 
-    def remove_songs(self, playlist_id: str):
+    def remove_playlist_items(self, playlist_id: str, video_ids: List[str]) -> int:
         """
-        Remove all songs from a given playlist.
+        Remove the given songs from a playlist. Songs not in the playlist are ignored.
+        Returns the number of playlist items removed.
         """
-        playlist_items = self.api.get_playlist(playlist_id, 10000)
-        if "tracks" in playlist_items:
-            self.api.remove_playlist_items(playlist_id, playlist_items["tracks"])
+        video_ids = set(video_ids)
+        playlist_items = self._call_with_backoff(
+            self.api.get_playlist, playlist_id, None, metric="api.get_playlist"
+        )
+        tracks = [
+            track
+            for track in playlist_items.get("tracks") or []
+            if track.get("videoId") in video_ids
+        ]
+        if tracks:
+            self._call_with_backoff(
+                self.api.remove_playlist_items,
+                playlist_id,
+                tracks,
+                metric="api.remove_playlist_items",
+            )
+        return len(tracks)
 
-    def remove_playlists_by_pattern(self, pattern: str):
+    def remove_playlists_by_pattern(
+        self, pattern: str, workers: int = 4, dry_run: bool = False
+    ) -> Optional[BulkResult]:
         """
-        Remove all playlists that match a given pattern.
+        Remove all playlists that match a given pattern, after confirmation.
+        With dry_run=True, only print the playlists that would be removed.
         """
-        playlists = self.api.get_library_playlists(10000)
-        matching_playlists = [pl for pl in playlists if re.match(pattern, pl["title"])]
+        matching_playlists = self.library.match(pattern)
 
         if not matching_playlists:
             print("No playlists matched the pattern.")
-            return
+            return None
+
+        playlist_ids = [pl["playlistId"] for pl in matching_playlists]
+        if dry_run:
+            return self.delete_playlists(playlist_ids, dry_run=True)
 
         print("The following playlists will be removed:")
         print("\n".join([pl["title"] for pl in matching_playlists]))
 
         confirmation = input("Please confirm (y/n): ").lower()
         if confirmation.startswith("y"):
-            for playlist in matching_playlists:
-                self.api.delete_playlist(playlist["playlistId"])
-            print(f"{len(matching_playlists)} playlists deleted.")
-        else:
-            print("Aborted. No playlists were deleted.")
+            return self.delete_playlists(playlist_ids, workers=workers)
+        print("Aborted. No playlists were deleted.")
+        return None
+
+    def create_playlists(
+        self,
+        names: List[str],
+        description: str = "",
+        privacy: str = "PRIVATE",
+        workers: int = 4,
+        dry_run: bool = False,
+        skip_existing: bool = True,
+    ) -> BulkResult:
+        """
+        Create many playlists concurrently. `succeeded` maps each name to its playlist ID.
+        With skip_existing, names already in the library (exact title) are not created again
+        and map to the existing playlist.
+        """
+        existing = {}
+        to_create = []
+        for name in dict.fromkeys(names):
+            playlist_id = self.library.get(name) if skip_existing else None
+            if playlist_id is not None:
+                existing[name] = playlist_id
+            else:
+                to_create.append(name)
+        if existing:
+            print(f"{len(existing)} playlists already exist and are skipped.")
+
+        def create(name: str) -> str:
+            playlist_id = self._call_with_backoff(
+                self.api.create_playlist, name, description, privacy, metric="api.create_playlist"
+            )
+            if not isinstance(playlist_id, str):  # ytmusicapi returns the response on failure
+                raise RuntimeError(f"Unexpected response: {playlist_id}")
+            return playlist_id
+
+        result = self._run_bulk("create playlist", to_create, create, workers, dry_run)
+        self.library.add_many(result.succeeded.items())
+        return BulkResult({**existing, **result.succeeded}, result.failed, result.planned)
+
+    def delete_playlists(
+        self, playlist_ids: List[str], workers: int = 4, dry_run: bool = False
+    ) -> BulkResult:
+        """
+        Delete many playlists concurrently.
+        """
+        result = self._run_bulk(
+            "delete playlist",
+            list(dict.fromkeys(playlist_ids)),
+            lambda playlist_id: self._call_with_backoff(
+                self.api.delete_playlist, playlist_id, metric="api.delete_playlist"
+            ),
+            workers,
+            dry_run,
+            describe=self._playlist_describer(),
+        )
+        self.library.remove_many(result.succeeded)
+        return result
+
+    def clear_playlists(
+        self, playlist_ids: List[str], workers: int = 4, dry_run: bool = False
+    ) -> BulkResult:
+        """
+        Remove all songs from many playlists concurrently (see remove_songs).
+        `succeeded` maps each playlist ID to the number of songs removed.
+        """
+        return self._run_bulk(
+            "clear playlist",
+            list(dict.fromkeys(playlist_ids)),
+            self.remove_songs,
+            workers,
+            dry_run,
+            describe=self._playlist_describer(),
+        )
+
+    def _playlist_describer(self) -> Callable[[str], str]:
+        """Return a function printing a playlist ID with its title."""
+        titles = {pl["playlistId"]: pl["title"] for pl in self.library.playlists}
+
+        def describe(playlist_id: str) -> str:
+            title = titles.get(playlist_id)
+            return f"'{title}' ({playlist_id})" if title is not None else playlist_id
+
+        return describe
+
+    def _run_bulk(
+        self,
+        action: str,
+        items: List[str],
+        func: Callable[[str], object],
+        workers: int,
+        dry_run: bool,
+        describe: Callable[[str], str] = repr,
+    ) -> BulkResult:
+        """
+        Apply func to every item, up to `workers` at a time. API calls go through the shared
+        rate limiter, and throttled calls are retried with backoff. Other errors don't stop
+        the operation: they are collected per item in `failed`.
+        With dry_run, nothing is changed and the planned mutations are printed and returned.
+        """
+        if dry_run:
+            planned = [f"{action} {describe(item)}" for item in items]
+            print(f"[dry run] {len(planned)} changes planned:")
+            for line in planned:
+                print(f"  {line}")
+            return BulkResult({}, {}, planned)
+
+        def attempt(item):
+            try:
+                return True, func(item)
+            except Exception as e:
+                return False, e
+
+        succeeded, failed = {}, {}
+        for item, (ok, value) in _ordered_map(attempt, items, workers):
+            if ok:
+                succeeded[item] = value
+            else:
+                failed[item] = str(value)
+                TermCol.print(f"Failed to {action} {describe(item)}: {value}", Color.YELLOW)
+        print(f"{action}: {len(succeeded)} succeeded, {len(failed)} failed.")
+        return BulkResult(succeeded, failed, [])
 
     def remove_playlists(self, playlist_id: str, no_confirm: bool = False):
         """Remove a playlist by its ID."""
@@ -149,13 +646,102 @@ class TYMusicOp:
         if not no_confirm:
             confirmation = input("Please confirm (y/n): ").lower()
             if confirmation.startswith("y"):
-                self.api.delete_playlist(playlist_id)
+                with self.metrics.timer("api.delete_playlist"):
+                    self.api.delete_playlist(playlist_id)
+                self.library.remove(playlist_id)
                 print(f"Playlist with ID {playlist_id} deleted.")
         else:
-            self.api.delete_playlist(playlist_id)
+            with self.metrics.timer("api.delete_playlist"):
+                self.api.delete_playlist(playlist_id)
+            self.library.remove(playlist_id)
             print(f"Playlist with ID {playlist_id} deleted.")
 
-    def _build_query(self, track: dict, query_type: str = "detailed") -> str:
+    def _search(self, query: str) -> List[dict]:
+        """
+        Search YouTube Music. Queries recently searched during this run are served from memory,
+        then from the persistent cache when available. A query already being searched by
+        another worker waits for that search instead of sending the same one.
+        """
+        key = SearchCache.normalize_query(query)
+        with self._run_lock:
+            future = self._run_results.get(key)
+            searching = future is None
+            if searching:
+                future = self._run_results[key] = Future()
+                if len(self._run_results) > self.run_cache_size:
+                    self._run_results.popitem(last=False)
+            else:
+                self._run_results.move_to_end(key)
+        if not searching:
+            self._count("deduplicated")
+            return future.result()
+
+        try:
+            yt_results = self._search_uncached(query)
+        except BaseException as e:
+            with self._run_lock:
+                if self._run_results.get(key) is future:
+                    del self._run_results[key]  # the next identical query searches again
+            future.set_exception(e)
+            raise
+        future.set_result(yt_results)
+        return yt_results
+
+    def _search_uncached(self, query: str) -> List[dict]:
+        if self.cache is not None:
+            yt_results = self.cache.get(query, self.language)
+            if yt_results is not None:
+                self._count("cache_hits")
+                return yt_results
+
+        self._count("api_calls")
+        yt_results = self._call_with_backoff(self.api.search, query, metric="api.search")
+        if self.cache is not None:
+            self.cache.set(query, self.language, yt_results)
+        return yt_results
+
+    def _count(self, key: str, value: int = 1):
+        self.metrics.count(f"search.{key}", value)
+
+    def _call_with_backoff(
+        self,
+        func,
+        *args,
+        retry_any_error: bool = False,
+        metric: Optional[str] = None,
+        **kwargs,
+    ):
+        """
+        Call an API function under the rate limiter, retrying with exponential backoff
+        when the server throttles the request (HTTP 429 / 503), or on any error if retry_any_error.
+        Each attempt is timed under `metric`; time spent waiting for the rate limiter is
+        recorded separately under "rate_limiter.wait".
+        """
+        delay = 1.0
+        for attempt in range(self.max_retries + 1):
+            if self.rate_limiter is not None:
+                with self.metrics.timer("rate_limiter.wait"):
+                    self.rate_limiter.acquire()
+            try:
+                if metric is None:
+                    return func(*args, **kwargs)
+                with self.metrics.timer(metric):
+                    return func(*args, **kwargs)
+            except Exception as e:
+                if attempt == self.max_retries or not (retry_any_error or self._is_throttled(e)):
+                    raise
+                self.metrics.count("api.retries")
+                TermCol.print(f"Request failed ({e}), retrying in {delay:.0f}s...", Color.YELLOW)
+                time.sleep(delay)
+                delay *= 2
+
+    @staticmethod
+    def _is_throttled(error: Exception) -> bool:
+        message = str(error)
+        return "429" in message or "503" in message or "Too Many Requests" in message
+
+    @staticmethod
+    def _build_query(track: dict, query_type: str = "detailed") -> str:
         """
         Build a search query from the external track data.
         The query_type parameter determines the type of query:
@@ -187,9 +773,13 @@ class TYMusicOp:
         else:
             raise ValueError(f"Unknown query_type: {query_type}")
 
-    def _extract_yt_tracks(self, yt_results: List[dict]) -> List[Track]:
+    @staticmethod
+    def _extract_yt_tracks(
+        yt_results: List[dict], keywords: Optional[Tuple[str, ...]] = None
+    ) -> List[Track]:
         """
         Extract valid YouTube tracks from search results.
+        Pass the matcher's keywords to normalize the tracks while they are built.
         """
         yt_tracks = []
         for result in yt_results:
@@ -207,12 +797,14 @@ class TYMusicOp:
                 isYT=True,
                 isTopResult=result.get("category") == "Top result"
                 or result.get("category") == "上位の検索結果",
+                keywords=keywords,
             )
             yt_tracks.append(yt_track)
 
         return yt_tracks
 
-    def _build_external_track(self, track: dict) -> Track:
+    @staticmethod
+    def _build_external_track(track: dict, keywords: Optional[Tuple[str, ...]] = None) -> Track:
         """
         Build a Track object from external track data.
         """
@@ -221,6 +813,7 @@ class TYMusicOp:
             artists=track["artists"],
             album=track["album"],
             duration=track["duration"],
+            keywords=keywords,
         )
 
     def _find_best_match(
@@ -229,10 +822,28 @@ class TYMusicOp:
         """
         Use the MusicMatcher to find the best matching YouTube track for an external track.
         """
-        matcher = MusicMatcher(tolerance=tolerance)
-        match = matcher.match_tracks_one_to_many(external_track, yt_tracks)
+        match = self._get_matcher(tolerance).match_tracks_one_to_many(external_track, yt_tracks)
         return match
 
+    def _get_matcher(self, tolerance: float) -> MusicMatcher:
+        """
+        Return the shared matcher for a tolerance. MusicMatcher is stateless,
+        so one instance serves every track and worker thread.
+        """
+        matcher = self._matchers.get(tolerance)
+        if matcher is None:
+            matcher = self._matchers.setdefault(
+                tolerance, MusicMatcher(tolerance=tolerance, similarity=self.similarity)
+            )
+        return matcher
+
+    def similarity_cache_stats(self) -> Dict[float, dict]:
+        """Hit rate of the artist/album similarity cache of each matcher, by tolerance."""
+        return {
+            tolerance: matcher.similarity_cache_stats()
+            for tolerance, matcher in self._matchers.items()
+        }
+
     def _handle_not_found_tracks(self, not_found_tracks: List[dict], playlist_name: str):
         """
         Handle tracks that were not found on YouTube Music.